@@ -3,10 +3,17 @@ DFM Scenario Analysis Tool v4.0 (FS1)
 Dubai Financial Market - Earnings & Investment Risk Sensitivity Analysis
 """
 
+import io
+from collections import ChainMap
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 
+from parsers.common import EXCEL_ENGINE
 from parsers.pdf_financials import (
     parse_pdf_financials,
     compute_portfolio_from_metrics,
@@ -15,25 +22,14 @@ from parsers.pdf_financials import (
 
 st.set_page_config(page_title="DFM Scenario Analysis", page_icon="📊", layout="wide", initial_sidebar_state="expanded")
 
-st.markdown("""
-<style>
-    .stApp { background-color: #FFFFFF; }
-    .main .block-container { padding-top: 2rem; max-width: 1200px; }
-    h1, h2, h3, p, span, div, label { font-family: 'Inter', sans-serif !important; color: #1A1A1A; }
-    .main-header { color: #0066CC; font-size: 2rem; font-weight: 700; }
-    .sub-header { color: #666666; font-size: 0.95rem; }
-    .metric-card-highlight { background: #E6F0FA; border: 1px solid #0066CC; border-radius: 8px; padding: 1.25rem; margin: 0.5rem 0; }
-    .metric-label { color: #666666; font-size: 0.75rem; text-transform: uppercase; font-weight: 500; }
-    .metric-value-blue { color: #0066CC; font-size: 1.5rem; font-weight: 600; font-family: monospace; }
-    [data-testid="stSidebar"] { background-color: #F5F5F5; }
-    .section-divider { border: none; height: 1px; background: #E0E0E0; margin: 1.5rem 0; }
-    .info-box { background: #E6F0FA; border-left: 4px solid #0066CC; padding: 1rem; border-radius: 0 8px 8px 0; margin: 1rem 0; }
-    .success-box { background: #E8F5E9; border-left: 4px solid #28A745; padding: 1rem; border-radius: 0 8px 8px 0; margin: 1rem 0; }
-    .warning-box { background: #FFF3E0; border-left: 4px solid #FF9800; padding: 1rem; border-radius: 0 8px 8px 0; margin: 1rem 0; }
-    #MainMenu {visibility: hidden;} footer {visibility: hidden;}
-    [data-testid="stMetricValue"] { color: #0066CC !important; }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data(show_spinner=False)
+def _app_css():
+    """Page stylesheet from assets/app.css, read from disk once per process"""
+    return f"<style>\n{(Path(__file__).parent / 'assets' / 'app.css').read_text(encoding='utf-8')}</style>"
+
+# Page styling; re-emitted on each full rerun (Streamlit drops elements a rerun
+# doesn't repeat), while tab fragment reruns skip it entirely
+st.markdown(_app_css(), unsafe_allow_html=True)
 
 # ============ DEFAULTS (Q3 2025, all in AED thousands) ============
 DEFAULT = {
@@ -51,6 +47,52 @@ DEFAULT = {
     'trading_days': 252,
 }
 
+# Upload cap, matching server.maxUploadSize in config.toml
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+# Financial statement metrics that replace DEFAULT when the parser finds them
+FS_KEYS = (
+    'trading_commission', 'investment_income', 'dividend_income',
+    'finance_income', 'investment_deposits', 'investments_amortised_cost',
+    'fvtoci', 'fvtoci_equity', 'fvtoci_funds', 'fvtoci_sukuk',
+    'cash_and_equivalents', 'period_months',
+    'investment_income_deposits', 'investment_income_amortised_cost',
+    'investment_income_fvtoci',
+)
+
+@dataclass(frozen=True, slots=True)
+class Baseline:
+    """Resolved baseline for one rerun: defaults, uploads and manual overrides, plus derived values (AED thousands)"""
+    trading_commission: float
+    investment_income: float
+    investment_deposits: float
+    investments_amortised_cost: float
+    fvtoci: float
+    fvtoci_equity: float
+    fvtoci_funds: float
+    fvtoci_sukuk: float
+    dividend_income: float
+    total_traded_value: float
+    period_months: int
+    trading_days: int
+    # Derived
+    portfolio: float
+    ear_portfolio: float
+    comm_rate: float  # bps
+    adtv: float
+    comm_annual: float
+    inv_annual: float
+    # Only present when a financial statement is uploaded
+    finance_income: float = 0
+    cash_and_equivalents: float = 0
+    investment_income_deposits: float = 0
+    investment_income_amortised_cost: float = 0
+    investment_income_fvtoci: float = 0
+
+# Layout shared by every chart; a fixed uirevision lets the browser keep its
+# UI state (zoom, hover mode) when a rerun only changes the data
+BASE_LAYOUT = {'plot_bgcolor': 'white', 'uirevision': 'fixed'}
+
 def fmt_smart(val_thousands):
     """
     Smart formatting: converts AED thousands to appropriate unit
@@ -62,26 +104,31 @@ def fmt_smart(val_thousands):
     """
     try:
         v = float(val_thousands)
-        if v == 0:
-            return "AED 0"
-        
-        # Handle negative numbers
-        sign = ""
-        if v < 0:
-            sign = "-"
-            v = abs(v)
-        
-        # Convert from thousands to actual AED
-        aed = v * 1000
-        
-        if aed >= 1_000_000_000:  # >= 1 Billion
-            return f"{sign}AED {aed / 1_000_000_000:.2f}B"
-        elif aed >= 1_000_000:  # >= 1 Million
-            return f"{sign}AED {aed / 1_000_000:.2f}M"
-        else:  # Thousands
-            return f"{sign}AED {aed / 1_000:.2f}K"
-    except:
+    except (TypeError, ValueError):
         return "N/A"
+    return _fmt_smart_cached(v)
+
+@lru_cache(maxsize=1024)
+def _fmt_smart_cached(v):
+    """Memoized body of fmt_smart; the same handful of values repeat on every rerun"""
+    if v == 0:
+        return "AED 0"
+    
+    # Handle negative numbers
+    sign = ""
+    if v < 0:
+        sign = "-"
+        v = abs(v)
+    
+    # Convert from thousands to actual AED
+    aed = v * 1000
+    
+    if aed >= 1_000_000_000:  # >= 1 Billion
+        return f"{sign}AED {aed / 1_000_000_000:.2f}B"
+    elif aed >= 1_000_000:  # >= 1 Million
+        return f"{sign}AED {aed / 1_000_000:.2f}M"
+    else:  # Thousands
+        return f"{sign}AED {aed / 1_000:.2f}K"
 
 def fmt_smart_raw(val_aed):
     """
@@ -89,24 +136,39 @@ def fmt_smart_raw(val_aed):
     """
     try:
         v = float(val_aed)
-        if v <= 0:
-            return "N/A"
-        
-        if v >= 1_000_000_000:  # >= 1 Billion
-            return f"AED {v / 1_000_000_000:.2f}B"
-        elif v >= 1_000_000:  # >= 1 Million
-            return f"AED {v / 1_000_000:.2f}M"
-        elif v >= 1_000:  # >= 1 Thousand
-            return f"AED {v / 1_000:.2f}K"
-        else:
-            return f"AED {v:.2f}"
-    except:
+    except (TypeError, ValueError):
         return "N/A"
+    return _fmt_smart_raw_cached(v)
+
+@lru_cache(maxsize=256)
+def _fmt_smart_raw_cached(v):
+    """Memoized body of fmt_smart_raw"""
+    if v <= 0:
+        return "N/A"
+    
+    if v >= 1_000_000_000:  # >= 1 Billion
+        return f"AED {v / 1_000_000_000:.2f}B"
+    elif v >= 1_000_000:  # >= 1 Million
+        return f"AED {v / 1_000_000:.2f}M"
+    elif v >= 1_000:  # >= 1 Thousand
+        return f"AED {v / 1_000:.2f}K"
+    else:
+        return f"AED {v:.2f}"
+
+@lru_cache(maxsize=512)
+def fmt_b(val_thousands):
+    """AED thousands as billions to one decimal, for traded values"""
+    return f"AED {val_thousands / 1_000_000:.1f}B"
+
+@lru_cache(maxsize=512)
+def fmt_m(val_thousands):
+    """AED thousands as millions to one decimal, for ADTV"""
+    return f"AED {val_thousands / 1_000:.1f}M"
 
-def parse_pdf(file):
-    """Parse financial statement PDF using the parsers module."""
+def parse_pdf(raw):
+    """Parse financial statement PDF bytes using the parsers module."""
     try:
-        result = parse_pdf_financials(file)
+        result = _parse_pdf_bytes(raw)
         # Return in the format app.py expects: flat dict with metrics + items
         data = dict(result['metrics'])
         data['items'] = result.get('items', [])
@@ -119,1184 +181,1315 @@ def parse_pdf(file):
         st.error(f"PDF parsing error: {e}")
         return None
 
-def parse_excel(file):
-    """Parse bulletin Excel - returns value in AED thousands"""
-    data = {'items': []}
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_pdf_bytes(raw):
+    """Cached PDF parse on the uploaded bytes, so reruns skip text extraction"""
+    return parse_pdf_financials(io.BytesIO(raw))
+
+def parse_excel(raw):
+    """Parse bulletin Excel bytes - returns value in AED thousands"""
     try:
-        df = pd.read_excel(file, sheet_name=0, header=1)
-        
-        # Find trade value column
-        tv_col = None
-        for c in df.columns:
-            if 'trade value' in str(c).lower():
-                tv_col = c
-                break
-        
-        if tv_col is None:
-            st.warning("No 'Trade Value' column found")
-            return None
-        
-        # Convert to numeric
-        df['TV'] = pd.to_numeric(df[tv_col].astype(str).str.replace(',', ''), errors='coerce')
-        
-        # Find name column
-        name_col = df.columns[0]
-        for c in df.columns:
-            if any(x in str(c).lower() for x in ['symbol', 'security', 'name']):
-                name_col = c
-                break
-        
-        # Look for total row
-        for pattern in ['Market Grand Total', 'Market Trades Total', 'Shares Grand Total', 'Grand Total']:
-            mask = df[name_col].astype(str).str.contains(pattern, case=False, na=False)
-            if mask.any():
-                val = df.loc[mask, 'TV'].iloc[0]
-                if pd.notna(val) and val > 0:
-                    # Bulletin reports in AED (not thousands), so divide by 1000 for internal use
-                    if val > 1_000_000_000_000:  # > 1 trillion = definitely in AED
-                        data['total_traded_value'] = val / 1000  # Convert to thousands
-                    else:
-                        data['total_traded_value'] = val / 1000  # Assume AED, convert to thousands
-                    
-                    # Display the raw value smartly
-                    data['items'].append(f"Traded Value: {fmt_smart_raw(val)}")
-                    break
-        
+        data = _parse_excel_bytes(raw)
     except Exception as e:
         st.error(f"Excel parsing error: {e}")
         return None
     
+    for w in data.get('warnings', []):
+        st.warning(w)
     return data if data.get('items') else None
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_excel_bytes(raw):
+    """Cached bulletin parse on the uploaded bytes; returns a small dict of scalars"""
+    data = {'items': []}
+    
+    # Read the header row only, then load just the two columns we need;
+    # both reads share one open workbook instead of unzipping it twice
+    with pd.ExcelFile(io.BytesIO(raw), engine=EXCEL_ENGINE) as workbook:
+        headers = workbook.parse(0, header=1, nrows=0).columns.astype(str).str.lower()
+        
+        # Find trade value column
+        tv_hits = np.flatnonzero(headers.str.contains('trade value', regex=False))
+        if not len(tv_hits):
+            data['warnings'] = ["No 'Trade Value' column found"]
+            return data
+        tv_idx = int(tv_hits[0])
+        
+        # Find name column (first column if none is labelled)
+        name_hits = np.flatnonzero(headers.str.contains('symbol|security|name'))
+        name_idx = int(name_hits[0]) if len(name_hits) else 0
+        
+        usecols = sorted({name_idx, tv_idx})
+        # Both columns as nullable strings: names are matched as text and Trade
+        # Value needs its thousands separators stripped before conversion anyway
+        df = workbook.parse(0, header=1, usecols=usecols, dtype="string")
+    names = df.iloc[:, usecols.index(name_idx)]
+    
+    # Look for total row: scan the name column once, then pick by pattern priority
+    patterns = ['market grand total', 'market trades total', 'shares grand total', 'grand total']
+    labels = names.str.lower()
+    hits = labels[labels.str.contains('|'.join(patterns), na=False)]
+    
+    # Convert to numeric, only for the candidate total rows
+    tv = pd.to_numeric(df.iloc[:, usecols.index(tv_idx)].loc[hits.index].str.replace(',', ''), errors='coerce')
+    for pattern in patterns:
+        matched = hits[hits.str.contains(pattern, regex=False)]
+        if len(matched):
+            val = tv.loc[matched.index[0]]
+            if pd.notna(val) and val > 0:
+                # Bulletin reports in AED (not thousands), so divide by 1000 for internal use
+                data['total_traded_value'] = float(val) / 1000
+                
+                # Display the raw value smartly
+                data['items'].append(f"Traded Value: {fmt_smart_raw(val)}")
+                break
+    
+    return data
+
+def _parse_once(file, key, parser):
+    """Keep the parse in session_state, keyed by the upload's file_id"""
+    # The uploader issues a new file_id for every upload, so reruns reuse the
+    # result without touching the bytes. A failed parse is kept as None too, so
+    # it is not retried (and its error re-shown) until the file is replaced
+    if st.session_state.get(f'{key}_file_id') == file.file_id:
+        return st.session_state[f'{key}_parsed']
+    if file.size > MAX_UPLOAD_BYTES:
+        st.error(f"{file.name} is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        data = None
+    else:
+        data = parser(file.getvalue())
+    st.session_state[f'{key}_parsed'] = data
+    st.session_state[f'{key}_file_id'] = file.file_id
+    return data
+
 def calc_comm(tv, bps): 
     """Calculate commission (tv in thousands, returns thousands)"""
     try:
-        return float(tv) * float(bps) / 10000 if tv and bps and float(tv) > 0 and float(bps) > 0 else 0
-    except:
+        # Non-positive (or NaN) inputs clamp to zero, so the product is zero too
+        return max(0.0, float(tv)) * max(0.0, float(bps)) / 10000
+    except (TypeError, ValueError):
         return 0
 
 def calc_inv(port, rate): 
     """Calculate investment income (port in thousands, returns thousands)"""
     try:
-        return float(port) * float(rate) / 100 if port and rate is not None and float(port) > 0 and float(rate) >= 0 else 0
-    except:
+        return max(0.0, float(port)) * max(0.0, float(rate)) / 100
+    except (TypeError, ValueError):
         return 0
 
 def clamp(val, min_v, max_v, default):
     """Safely clamp a value between min and max"""
     try:
         v = float(val)
-        if v < min_v: return default
-        if v > max_v: return default
-        return v
-    except:
+    except (TypeError, ValueError):
         return default
+    # One chained comparison; NaN fails it and falls back to the default too
+    return v if min_v <= v <= max_v else default
 
-def main():
-    st.markdown('<p class="main-header">📊 DFM Scenario Analysis</p>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-header">Dubai Financial Market | Earnings Sensitivity Tool</p>', unsafe_allow_html=True)
-    
-    # ========== SIDEBAR ==========
-    with st.sidebar:
-        st.markdown("## 📁 Data Sources")
-        st.markdown("### Financial Statement")
-        fs_file = st.file_uploader("Upload PDF", type=['pdf'], key="fs")
-        st.markdown("### Market Bulletin")
-        bul_file = st.file_uploader("Upload Excel", type=['xlsx', 'xls'], key="bul")
-        st.markdown("---")
-        st.markdown("### ⚙️ Manual Input")
-        use_manual = st.checkbox("Enter values manually", value=False)
-    
-    # ========== PARSE FILES ==========
-    fs = parse_pdf(fs_file) if fs_file else None
-    bul = parse_excel(bul_file) if bul_file else None
+SECTION_DIVIDER = '<hr class="section-divider">'
+
+def section_divider():
+    """Thin rule between page sections (styled in assets/app.css)"""
+    st.markdown(SECTION_DIVIDER, unsafe_allow_html=True)
+
+def _status_html(loaded, title, lines, warnings=()):
+    """Success/warning box HTML for a data source"""
+    if not loaded:
+        return f'<div class="warning-box"><strong>⚠️ {title}</strong><br>{"<br>".join(lines)}</div>'
+    warn_html = "".join(f'<br><span style="color:#FF9800">⚠️ {w}</span>' for w in warnings)
+    return f'<div class="success-box"><strong>✅ {title}</strong><br>{"<br>".join(lines)}{warn_html}</div>'
+
+def _metric_card_html(label, value, sub):
+    """Baseline metric card HTML"""
+    return f'''<div class="metric-card-highlight">
+            <div class="metric-label">{label}</div>
+            <div class="metric-value-blue">{value}</div>
+            <div style="color:#666;font-size:0.75rem">{sub}</div>
+        </div>'''
+
+def _fee_impact_df(current_total_bps, new_total_bps, current_dfm_rate, new_dfm_rate, tv, adtv, curr_comm, new_comm):
+    """Tab 1 fee scenario impact table (traded value and income in AED thousands)"""
+    return pd.DataFrame({
+        'Metric': ['Total Market Fee', 'DFM Effective Rate', 'Annual Traded Value', 'ADTV', 'Annual Commission Income'],
+        'Current': [
+            f"{current_total_bps:.1f} bps",
+            f"{current_dfm_rate:.1f} bps",
+            fmt_smart(tv),
+            fmt_smart(adtv),
+            fmt_smart(curr_comm),
+        ],
+        'Scenario': [
+            f"{new_total_bps:.1f} bps",
+            f"{new_dfm_rate:.1f} bps",
+            fmt_smart(tv),
+            fmt_smart(adtv),
+            fmt_smart(new_comm),
+        ],
+        'Change': [
+            f"{new_total_bps - current_total_bps:+.1f} bps",
+            f"{new_dfm_rate - current_dfm_rate:+.1f} bps",
+            "—",
+            "—",
+            fmt_smart(new_comm - curr_comm),
+        ],
+    })
+
+def _breakeven_df(tv, adtv, tv_required, adtv_required, increase_pct):
+    """Tab 1 break-even traded value table (AED thousands)"""
+    return pd.DataFrame({
+        'Metric': ['Annual Traded Value', 'Avg Daily Traded Value (ADTV)'],
+        'Current': [fmt_smart(tv), fmt_smart(adtv)],
+        'Required': [fmt_smart(tv_required), fmt_smart(adtv_required)],
+        'Increase Needed': [
+            f"{fmt_smart(tv_required - tv)} (+{increase_pct:.1f}%)",
+            f"{fmt_smart(adtv_required - adtv)} (+{increase_pct:.1f}%)",
+        ],
+    })
+
+def _tv_summary_df(baseline_tv, baseline_adtv, baseline_comm, scenario_tv, scenario_adtv, scenario_comm):
+    """Tab 2 baseline vs scenario summary table (all inputs in AED thousands)"""
+    delta_tv = scenario_tv - baseline_tv
+    delta_adtv = scenario_adtv - baseline_adtv
+    delta_comm = scenario_comm - baseline_comm
+    delta_tv_pct = (delta_tv / baseline_tv * 100) if baseline_tv > 0 else 0
+    comm_pct = (delta_comm / baseline_comm * 100) if baseline_comm > 0 else 0
+    return pd.DataFrame({
+        'Metric': ['Annual Traded Value', 'ADTV', 'Annual Commission Income'],
+        'Baseline': [
+            fmt_b(baseline_tv),
+            f"{fmt_m(baseline_adtv)} / day",
+            fmt_smart(baseline_comm),
+        ],
+        'Scenario': [
+            fmt_b(scenario_tv),
+            f"{fmt_m(scenario_adtv)} / day",
+            fmt_smart(scenario_comm),
+        ],
+        'Change': [
+            f"{delta_tv / 1_000_000:+.1f}B ({delta_tv_pct:+.1f}%)" if abs(delta_tv) > 0.5 else "—",
+            f"{delta_adtv / 1_000:+.1f}M / day" if abs(delta_adtv) > 0.5 else "—",
+            f"{delta_comm / 1_000:+.1f}M ({comm_pct:+.1f}%)" if abs(delta_comm) > 0.5 else "—",
+        ],
+    })
+
+def _combined_revenue_df(bl_comm, bl_inv, sc_comm, sc_inv):
+    """Tab 4 revenue comparison table (all inputs in AED thousands, left numeric for Styler formatting)"""
+    bl_total = bl_comm + bl_inv
+    sc_total = sc_comm + sc_inv
+    return pd.DataFrame({
+        'Revenue': ['Trading Commission', 'Investment Income', 'TOTAL'],
+        'Baseline': [bl_comm, bl_inv, bl_total],
+        'Scenario': [sc_comm, sc_inv, sc_total],
+        'Change': [sc_comm - bl_comm, sc_inv - bl_inv, sc_total - bl_total]
+    })
+
+# Fixed shock grids for the sensitivity tables, with their row labels
+RATE_SHIFTS_BP = np.array([100, 50, 25, 0, -25, -50, -100, -150, -200])
+RATE_SHIFT_LABELS = tuple(f"{bp:+d} bps" for bp in RATE_SHIFTS_BP)
+EAR_SHOCKS_BP = np.array([-200, -150, -100, -50, -25, 0, 25, 50, 100])
+EAR_SHOCK_LABELS = tuple(f"{bp:+d} bps" for bp in EAR_SHOCKS_BP)
+
+# Tab 3 rate change choices (percentage points)
+RATE_CHANGES = {"+50 bps": 0.5, "+25 bps": 0.25, "No change": 0, "-25 bps": -0.25, "-50 bps": -0.5, "-100 bps": -1.0, "-150 bps": -1.5}
+RATE_CHANGE_OPTIONS = tuple(RATE_CHANGES)
+
+def _rate_sensitivity_df(portfolio, cur_rate):
+    """Tab 3 rate sensitivity table (portfolio in AED thousands, left numeric for Styler formatting)"""
+    new_rates = np.maximum(0.0, cur_rate + RATE_SHIFTS_BP / 100)
+    incomes = max(0.0, portfolio) * new_rates / 100
+    return pd.DataFrame({
+        'Rate Δ': RATE_SHIFT_LABELS,
+        'New Rate': new_rates,
+        'Income': incomes,
+        'Impact': incomes - calc_inv(portfolio, cur_rate),
+    })
+
+# The only table worth caching: its 45 fmt_smart calls cost more than the
+# hash and pickle of a hit. Keyed on slider values, so the cache is bounded
+@st.cache_data(show_spinner=False, max_entries=64)
+def _ear_sensitivity_df(sensitive_deposits, ac_bal, sukuk_bal, total_inc_ann):
+    """Tab 5 full EaR sensitivity table across all rate shocks (balances in AED thousands)"""
+    d_dep = sensitive_deposits * EAR_SHOCKS_BP / 10000
+    d_ac = ac_bal * EAR_SHOCKS_BP / 10000
+    d_sk = sukuk_bal * EAR_SHOCKS_BP / 10000
+    d_tot = d_dep + d_ac + d_sk
+    if total_inc_ann > 0:
+        change = [f"{pct:+.1f}%" for pct in d_tot / total_inc_ann * 100]
+    else:
+        change = ["—"] * len(EAR_SHOCKS_BP)
+    return pd.DataFrame({
+        'Rate Shock': EAR_SHOCK_LABELS,
+        'Deposits Impact': [fmt_smart(v) for v in d_dep],
+        'AC Impact': [fmt_smart(v) for v in d_ac],
+        'Sukuk Impact': [fmt_smart(v) for v in d_sk],
+        'Total Impact': [fmt_smart(v) for v in d_tot],
+        'New Total Income': [fmt_smart(v) for v in total_inc_ann + d_tot],
+        'Change': change,
+    })
+
+def _memo_figure(key, inputs, build):
+    """Reuse the figure from the previous rerun; when its inputs change, refresh it in place"""
+    memo = st.session_state.get(key)
+    if memo is not None and memo[0] == inputs:
+        return memo[1]
+    if memo is None:
+        fig = build(*inputs)
+    else:
+        # Same skeleton, new numbers: patch the traces instead of rebuilding
+        fig = memo[1]
+        with fig.batch_update():
+            build(*inputs, fig=fig)
+    st.session_state[key] = (inputs, fig)
+    return fig
+
+def _tv_bar_figure(baseline_tv, scenario_annual_tv, fig=None):
+    """Tab 2 baseline vs scenario annual traded value bars"""
+    if fig is None:
+        import plotly.graph_objects as go
+        
+        fig = go.Figure(go.Bar(
+            x=['Baseline', 'Scenario'],
+            textposition='outside',
+            textfont=dict(size=13),
+        ))
+        fig.update_layout(
+            title="Annual Traded Value: Baseline vs Scenario",
+            height=380,
+            **BASE_LAYOUT,
+            yaxis_title='AED Billions',
+            showlegend=False,
+        )
     
-    # ========== BUILD DATA ==========
-    d = DEFAULT.copy()
+    delta_annual_total = scenario_annual_tv - baseline_tv
+    values = [baseline_tv / 1_000_000, scenario_annual_tv / 1_000_000]
+    colors = ['#0066CC', '#28A745' if delta_annual_total >= 0 else '#DC3545']
+    texts = [f"AED {v:.1f}B" for v in values]
     
-    if fs:
-        # Copy all extracted metrics into d
-        fs_keys = [
-            'trading_commission', 'investment_income', 'dividend_income',
-            'finance_income', 'investment_deposits', 'investments_amortised_cost',
-            'fvtoci', 'fvtoci_equity', 'fvtoci_funds', 'fvtoci_sukuk',
-            'cash_and_equivalents', 'period_months',
-            'investment_income_deposits', 'investment_income_amortised_cost',
-            'investment_income_fvtoci',
-        ]
-        for key in fs_keys:
-            if key in fs and fs[key]:
-                d[key] = fs[key]
+    fig.data[0].update(y=values, marker_color=colors, text=texts)
+    fig.update_layout(yaxis_range=[0, max(values) * 1.15])
+    return fig
+
+def _revenue_bridge_figure(bl_comm, bl_inv, sc_comm, sc_inv, fig=None):
+    """Tab 4 revenue bridge waterfall"""
+    if fig is None:
+        import plotly.graph_objects as go
+        
+        fig = go.Figure(go.Waterfall(
+            orientation="v",
+            measure=["absolute", "relative", "relative", "total"],
+            x=["Baseline", "Commission Δ", "Investment Δ", "Scenario"],
+            textposition="outside",
+            connector={"line": {"color": "#0066CC"}},
+            decreasing={"marker": {"color": "#DC3545"}},
+            increasing={"marker": {"color": "#28A745"}},
+            totals={"marker": {"color": "#0066CC"}}
+        ))
+        fig.update_layout(title="Revenue Bridge", height=350, **BASE_LAYOUT, yaxis_title="AED Millions", showlegend=False)
     
-    if bul and bul.get('total_traded_value'):
-        d['total_traded_value'] = bul['total_traded_value']
+    bl_total = bl_comm + bl_inv
+    sc_total = sc_comm + sc_inv
+    fig.data[0].update(
+        y=[bl_total/1000, (sc_comm-bl_comm)/1000, (sc_inv-bl_inv)/1000, sc_total/1000],
+        text=[fmt_smart(bl_total), fmt_smart(sc_comm-bl_comm), fmt_smart(sc_inv-bl_inv), fmt_smart(sc_total)],
+    )
+    return fig
+
+def _ear_figure(shock_bp, dep_inc_ann, ac_inc_ann, fvtoci_inc_ann, total_inc_ann, dep_new, ac_new, fvtoci_new, total_new, fig=None):
+    """Tab 5 earnings-at-risk current vs shocked income by bucket"""
+    if fig is None:
+        import plotly.graph_objects as go
+        
+        buckets = ['Deposits', 'Amortised Cost', 'FVTOCI Sukuk', 'Total']
+        fig = go.Figure([
+            go.Bar(name='Current Income', x=buckets, marker_color='#0066CC', textposition='outside'),
+            go.Bar(x=buckets, textposition='outside'),
+        ])
+        fig.update_layout(
+            barmode='group',
+            height=400,
+            **BASE_LAYOUT,
+            yaxis_title='AED Millions',
+        )
     
-    # Calculate derived values (all in thousands)
-    d['portfolio'] = d['investment_deposits'] + d['investments_amortised_cost'] + d.get('fvtoci', 0)
-    d['ear_portfolio'] = d['investment_deposits'] + d['investments_amortised_cost'] + d.get('fvtoci_sukuk', 0)
-    d['adtv'] = d['total_traded_value'] / d['trading_days']
-    d['comm_annual'] = d['trading_commission'] * 12 / d['period_months']
-    d['inv_annual'] = d['investment_income'] * 12 / d['period_months']
+    fig.data[0].update(
+        y=[dep_inc_ann / 1000, ac_inc_ann / 1000, fvtoci_inc_ann / 1000, total_inc_ann / 1000],
+        text=[fmt_smart(dep_inc_ann), fmt_smart(ac_inc_ann), fmt_smart(fvtoci_inc_ann), fmt_smart(total_inc_ann)],
+    )
+    fig.data[1].update(
+        name=f'After {shock_bp:+d} bps',
+        y=[dep_new / 1000, ac_new / 1000, fvtoci_new / 1000, total_new / 1000],
+        marker_color='#DC3545' if shock_bp < 0 else '#28A745',
+        text=[fmt_smart(dep_new), fmt_smart(ac_new), fmt_smart(fvtoci_new), fmt_smart(total_new)],
+    )
+    fig.update_layout(title=f"Investment Income: Current vs {shock_bp:+d} bps Scenario")
+    return fig
+
+def _oci_stress_figure(eq_shock_pct, rate_shock_bp, eq_stress, rate_stress, total_stress, fig=None):
+    """Tab 5 combined OCI stress bars"""
+    if fig is None:
+        import plotly.graph_objects as go
+        
+        fig = go.Figure(go.Bar(
+            marker_color=['#DC3545', '#FF9800', '#0066CC'],
+            textposition='outside',
+            textfont=dict(size=13),
+        ))
+        fig.update_layout(
+            height=420,
+            **BASE_LAYOUT,
+            yaxis_title='AED Millions',
+            showlegend=False,
+            margin=dict(b=80),
+        )
     
-    # Commission rate (bps)
-    if d['total_traded_value'] > 0 and d['comm_annual'] > 0:
-        d['comm_rate'] = d['comm_annual'] / d['total_traded_value'] * 10000
-    else:
-        d['comm_rate'] = 25.0
+    bar_labels = [
+        f'FVTOCI Equity<br>({eq_shock_pct:+d}% shock)',
+        f'FVTOCI Sukuk<br>({rate_shock_bp:+d} bps)',
+        'Total OCI Impact',
+    ]
+    bar_values = [eq_stress / 1000, rate_stress / 1000, total_stress / 1000]
+    bar_text = [fmt_smart(eq_stress), fmt_smart(rate_stress), fmt_smart(total_stress)]
+    fig.data[0].update(x=bar_labels, y=bar_values, text=bar_text)
     
-    # ========== MANUAL OVERRIDE ==========
-    if use_manual:
-        with st.sidebar:
-            st.markdown("#### Enter Values (AED '000)")
-            d['trading_commission'] = st.number_input("Trading Commission", value=float(d['trading_commission']), min_value=0.0, format="%.0f")
-            d['investment_income'] = st.number_input("Investment Income", value=float(d['investment_income']), min_value=0.0, format="%.0f")
-            d['portfolio'] = st.number_input("Portfolio", value=float(d['portfolio']), min_value=0.0, format="%.0f")
-            d['total_traded_value'] = st.number_input("Total Traded Value", value=float(d['total_traded_value']), min_value=0.0, format="%.0f")
-            d['comm_rate'] = st.number_input("Commission Rate (bps)", value=float(d['comm_rate']), min_value=0.1, max_value=100.0, format="%.1f")
-            # Recalculate
-            d['adtv'] = d['total_traded_value'] / d['trading_days'] if d['trading_days'] > 0 else 0
-            d['comm_annual'] = d['trading_commission'] * 12 / d['period_months']
-            d['inv_annual'] = d['investment_income'] * 12 / d['period_months']
+    # Calculate y-axis range to ensure labels aren't cut off
+    min_val = min(bar_values)
+    max_val = max(bar_values)
+    y_pad = max(abs(min_val), abs(max_val)) * 0.25
     
-    # ========== STATUS ==========
-    st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-    c1, c2 = st.columns(2)
-    with c1:
-        if fs:
-            items_html = "<br>".join(fs.get("items", []))
-            # Show warnings if any
-            warn_html = ""
-            for w in fs.get("warnings", []):
-                warn_html += f'<br><span style="color:#FF9800">⚠️ {w}</span>'
-            st.markdown(f'<div class="success-box"><strong>✅ Financial Statement</strong><br>{items_html}{warn_html}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="warning-box"><strong>⚠️ No FS uploaded</strong><br>Using Q3 2025 defaults</div>', unsafe_allow_html=True)
-    with c2:
-        if bul:
-            st.markdown(f'<div class="success-box"><strong>✅ Bulletin</strong><br>{"<br>".join(bul.get("items", []))}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="warning-box"><strong>⚠️ No Bulletin uploaded</strong><br>Using 2025 defaults</div>', unsafe_allow_html=True)
+    fig.update_layout(
+        title=f"OCI Stress Test: Equity {eq_shock_pct:+d}% + Rates {rate_shock_bp:+d} bps",
+        yaxis_range=[min_val - y_pad, max_val + y_pad],
+    )
+    return fig
+
+@st.fragment
+def _commission_tab(base, inv_trading_days):
+    """Tab 1: commission fee scenario and break-even traded value"""
+    st.markdown("### Commission Fee Scenario")
+    st.markdown("*Model fee reductions and calculate the traded value needed to offset the impact*")
     
-    # ========== METRICS ==========
-    st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-    st.markdown("### 📋 Baseline Metrics")
-    c1, c2, c3, c4, c5 = st.columns(5)
-    with c1:
-        st.markdown(f'''<div class="metric-card-highlight">
-            <div class="metric-label">Trading Commission ({d["period_months"]}M)</div>
-            <div class="metric-value-blue">{fmt_smart(d["trading_commission"])}</div>
-            <div style="color:#666;font-size:0.75rem">Annual: {fmt_smart(d["comm_annual"])}</div>
-        </div>''', unsafe_allow_html=True)
-    with c2:
-        st.markdown(f'''<div class="metric-card-highlight">
-            <div class="metric-label">Avg Daily Traded Value</div>
-            <div class="metric-value-blue">{fmt_smart(d["adtv"])}</div>
-            <div style="color:#666;font-size:0.75rem">Total: {fmt_smart(d["total_traded_value"])}</div>
-        </div>''', unsafe_allow_html=True)
-    with c3:
-        st.markdown(f'''<div class="metric-card-highlight">
-            <div class="metric-label">Investment Portfolio</div>
-            <div class="metric-value-blue">{fmt_smart(d["portfolio"])}</div>
-            <div style="color:#666;font-size:0.75rem">Deposits + AC + FVTOCI</div>
-        </div>''', unsafe_allow_html=True)
-    with c4:
-        st.markdown(f'''<div class="metric-card-highlight">
-            <div class="metric-label">Investment Income ({d["period_months"]}M)</div>
-            <div class="metric-value-blue">{fmt_smart(d["investment_income"])}</div>
-            <div style="color:#666;font-size:0.75rem">Annual: {fmt_smart(d["inv_annual"])}</div>
-        </div>''', unsafe_allow_html=True)
-    with c5:
-        div_inc = d.get('dividend_income', 0)
-        st.markdown(f'''<div class="metric-card-highlight">
-            <div class="metric-label">Dividend Income ({d["period_months"]}M)</div>
-            <div class="metric-value-blue">{fmt_smart(div_inc)}</div>
-            <div style="color:#666;font-size:0.75rem">FVTOCI equity dividends</div>
-        </div>''', unsafe_allow_html=True)
+    # -- Fee Structure (informational) --
+    st.markdown("##### DFM Market Fee Structure (ex-VAT)")
     
-    st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
+    fee_col1, fee_col2 = st.columns([2, 1])
     
-    # ========== SCENARIO TABS ==========
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📉 Commission Fee", "📊 Traded Value", "💰 Interest Rate", "🔄 Combined", "🏦 Investment Risk"])
+    with fee_col1:
+        # Editable fee components
+        st.markdown("Adjust any component to model a fee change:")
+        
+        fc1, fc2, fc3, fc4 = st.columns(4)
+        with fc1:
+            broker_bps = st.number_input("Broker (bps)", 0.0, 50.0, 12.5, 0.5, key="fee_broker")
+        with fc2:
+            market_bps = st.number_input("Market (bps)", 0.0, 50.0, 5.0, 0.5, key="fee_market")
+        with fc3:
+            sca_bps = st.number_input("SCA (bps)", 0.0, 50.0, 5.0, 0.5, key="fee_sca")
+        with fc4:
+            cds_bps = st.number_input("CDS (bps)", 0.0, 50.0, 5.0, 0.5, key="fee_cds")
+        
+        current_total_bps = 27.5  # fixed: current market total
+        new_total_bps = broker_bps + market_bps + sca_bps + cds_bps
+        fee_reduction_bps = new_total_bps - current_total_bps
     
-    # ---------- TAB 1: Commission Fee ----------
-    with tab1:
-        st.markdown("### Commission Fee Scenario")
-        st.markdown("*Model fee reductions and calculate the traded value needed to offset the impact*")
-        
-        # -- Fee Structure (informational) --
-        st.markdown("##### DFM Market Fee Structure (ex-VAT)")
-        
-        fee_col1, fee_col2 = st.columns([2, 1])
-        
-        with fee_col1:
-            # Editable fee components
-            st.markdown("Adjust any component to model a fee change:")
-            
-            fc1, fc2, fc3, fc4 = st.columns(4)
-            with fc1:
-                broker_bps = st.number_input("Broker (bps)", 0.0, 50.0, 12.5, 0.5, key="fee_broker")
-            with fc2:
-                market_bps = st.number_input("Market (bps)", 0.0, 50.0, 5.0, 0.5, key="fee_market")
-            with fc3:
-                sca_bps = st.number_input("SCA (bps)", 0.0, 50.0, 5.0, 0.5, key="fee_sca")
-            with fc4:
-                cds_bps = st.number_input("CDS (bps)", 0.0, 50.0, 5.0, 0.5, key="fee_cds")
-            
-            current_total_bps = 27.5  # fixed: current market total
-            new_total_bps = broker_bps + market_bps + sca_bps + cds_bps
-            fee_reduction_bps = new_total_bps - current_total_bps
-        
-        with fee_col2:
-            st.markdown(f'''<div class="metric-card-highlight">
+    with fee_col2:
+        st.markdown(f'''<div class="metric-card-highlight">
                 <div class="metric-label">Current Total Fee</div>
                 <div class="metric-value-blue">27.5 bps</div>
                 <div style="color:#666;font-size:0.75rem;margin-top:0.5rem">New Total Fee</div>
                 <div style="color:{'#DC3545' if new_total_bps < current_total_bps else '#28A745' if new_total_bps > current_total_bps else '#0066CC'};font-size:1.5rem;font-weight:600;font-family:monospace">{new_total_bps:.1f} bps</div>
                 <div style="color:#666;font-size:0.75rem">{fee_reduction_bps:+.1f} bps change</div>
             </div>''', unsafe_allow_html=True)
+    
+    section_divider()
+    
+    # -- Compute DFM's effective rate --
+    tv_billions = base.total_traded_value / 1_000_000
+    scenario_tv = base.total_traded_value  # in thousands
+    current_dfm_rate = base.comm_rate  # bps, computed from actuals
+    adtv = base.adtv  # in thousands
+    curr_comm = base.comm_annual  # annualised, in thousands
+    
+    # DFM's new rate: proportional to total market fee change
+    # If total market drops from 27.5 to 20, DFM rate drops by same ratio
+    if current_total_bps > 0:
+        rate_ratio = new_total_bps / current_total_bps
+    else:
+        rate_ratio = 1.0
+    new_dfm_rate = current_dfm_rate * rate_ratio
+    
+    # New commission income
+    new_comm = calc_comm(scenario_tv, new_dfm_rate)
+    diff = new_comm - curr_comm
+    pct_change = (diff / curr_comm * 100) if curr_comm > 0 else 0
+    
+    # -- Impact Analysis --
+    st.markdown("##### Impact on DFM Commission Income")
+    
+    impact_df = _fee_impact_df(current_total_bps, new_total_bps, current_dfm_rate, new_dfm_rate, scenario_tv, adtv, curr_comm, new_comm)
+    st.dataframe(impact_df, hide_index=True, use_container_width=True)
+    
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Current Commission Income", fmt_smart(curr_comm))
+    m2.metric("Scenario Commission Income", fmt_smart(new_comm), f"{fee_reduction_bps:+.1f} bps")
+    m3.metric("Annual Impact", fmt_smart(diff), f"{pct_change:+.1f}%", delta_color="normal")
+    
+    # -- Breakeven ADTV --
+    if new_total_bps < current_total_bps and new_dfm_rate > 0:
+        section_divider()
+        st.markdown("##### Breakeven Analysis: How Much Must Traded Value Increase?")
         
-        st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
+        tv_required = scenario_tv * (current_dfm_rate / new_dfm_rate)
+        tv_increase = tv_required - scenario_tv
+        tv_increase_pct = (tv_increase / scenario_tv * 100) if scenario_tv > 0 else 0
         
-        # -- Compute DFM's effective rate --
-        tv_billions = d['total_traded_value'] / 1_000_000
-        scenario_tv = d['total_traded_value']  # in thousands
-        current_dfm_rate = d['comm_rate']  # bps, computed from actuals
-        adtv = d['adtv']  # in thousands
-        curr_comm = d['comm_annual']  # annualised, in thousands
+        adtv_required = tv_required * inv_trading_days
         
-        # DFM's new rate: proportional to total market fee change
-        # If total market drops from 27.5 to 20, DFM rate drops by same ratio
-        if current_total_bps > 0:
-            rate_ratio = new_total_bps / current_total_bps
-        else:
-            rate_ratio = 1.0
-        new_dfm_rate = current_dfm_rate * rate_ratio
-        
-        # New commission income
-        new_comm = calc_comm(scenario_tv, new_dfm_rate)
-        diff = new_comm - curr_comm
-        pct_change = (diff / curr_comm * 100) if curr_comm > 0 else 0
-        
-        # -- Impact Analysis --
-        st.markdown("##### Impact on DFM Commission Income")
-        
-        impact_df = pd.DataFrame({
-            'Metric': ['Total Market Fee', 'DFM Effective Rate', 'Annual Traded Value', 'ADTV', 'Annual Commission Income'],
-            'Current': [
-                f"{current_total_bps:.1f} bps",
-                f"{current_dfm_rate:.1f} bps",
-                fmt_smart(scenario_tv),
-                fmt_smart(adtv),
-                fmt_smart(curr_comm),
-            ],
-            'Scenario': [
-                f"{new_total_bps:.1f} bps",
-                f"{new_dfm_rate:.1f} bps",
-                fmt_smart(scenario_tv),
-                fmt_smart(adtv),
-                fmt_smart(new_comm),
-            ],
-            'Change': [
-                f"{fee_reduction_bps:+.1f} bps",
-                f"{new_dfm_rate - current_dfm_rate:+.1f} bps",
-                "—",
-                "—",
-                fmt_smart(diff),
-            ],
-        })
-        st.dataframe(impact_df, hide_index=True, use_container_width=True)
+        be_df = _breakeven_df(scenario_tv, adtv, tv_required, adtv_required, tv_increase_pct)
+        st.dataframe(be_df, hide_index=True, use_container_width=True)
         
-        m1, m2, m3 = st.columns(3)
-        m1.metric("Current Commission Income", fmt_smart(curr_comm))
-        m2.metric("Scenario Commission Income", fmt_smart(new_comm), f"{fee_reduction_bps:+.1f} bps")
-        m3.metric("Annual Impact", fmt_smart(diff), f"{pct_change:+.1f}%", delta_color="normal")
-        
-        # -- Breakeven ADTV --
-        if new_total_bps < current_total_bps and new_dfm_rate > 0:
-            st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-            st.markdown("##### Breakeven Analysis: How Much Must Traded Value Increase?")
-            
-            tv_required = scenario_tv * (current_dfm_rate / new_dfm_rate)
-            tv_increase = tv_required - scenario_tv
-            tv_increase_pct = (tv_increase / scenario_tv * 100) if scenario_tv > 0 else 0
-            
-            adtv_required = tv_required / d['trading_days']
-            adtv_increase = adtv_required - adtv
-            
-            be_df = pd.DataFrame({
-                'Metric': ['Annual Traded Value', 'Avg Daily Traded Value (ADTV)'],
-                'Current': [fmt_smart(scenario_tv), fmt_smart(adtv)],
-                'Required': [fmt_smart(tv_required), fmt_smart(adtv_required)],
-                'Increase Needed': [
-                    f"{fmt_smart(tv_increase)} (+{tv_increase_pct:.1f}%)",
-                    f"{fmt_smart(adtv_increase)} (+{tv_increase_pct:.1f}%)",
-                ],
-            })
-            st.dataframe(be_df, hide_index=True, use_container_width=True)
-            
-            st.markdown(f'''<div class="info-box">
+        st.markdown(f'''<div class="info-box">
                 <strong>To maintain {fmt_smart(curr_comm)} commission income</strong> after a fee cut from {current_total_bps:.1f} to {new_total_bps:.1f} bps:<br><br>
                 ADTV must increase from <strong>{fmt_smart(adtv)}</strong> to <strong>{fmt_smart(adtv_required)}</strong> — a <strong>+{tv_increase_pct:.1f}%</strong> increase in market activity.
             </div>''', unsafe_allow_html=True)
-        
-        elif new_total_bps >= current_total_bps:
-            if new_total_bps > current_total_bps:
-                st.markdown(f'''<div class="success-box">
+    
+    elif new_total_bps >= current_total_bps:
+        if new_total_bps > current_total_bps:
+            st.markdown(f'''<div class="success-box">
                     Fee increase of {fee_reduction_bps:+.1f} bps generates additional commission income of <strong>{fmt_smart(diff)}</strong> per year at current traded value levels.
                 </div>''', unsafe_allow_html=True)
+
+@st.fragment
+def _traded_value_tab(base, bul):
+    """Tab 2: traded value drivers"""
+    st.markdown("### Traded Value Scenario")
+    st.markdown("*Model incremental traded value from strategic drivers using capital × turnover assumptions*")
     
-    # ---------- TAB 2: Traded Value ----------
-    with tab2:
-        st.markdown("### Traded Value Scenario")
-        st.markdown("*Model incremental traded value from strategic drivers using capital × turnover assumptions*")
-        
-        # ── Baseline ──────────────────────────────────────────────────
-        baseline_tv = d['total_traded_value']  # AED'000
-        baseline_rate = d['comm_rate']          # bps
-        baseline_comm = d['comm_annual']        # AED'000
-        has_bulletin = bul is not None
-        
-        equities_trading_days = st.number_input(
-            "Equities trading days per year", 200, 300, int(d.get('trading_days', 252)), 1,
-            key="tv_trading_days",
-        )
-        baseline_adtv = baseline_tv / equities_trading_days if equities_trading_days > 0 else 0  # AED'000
-        
-        src_tag = "📊 Bulletin" if has_bulletin else "⚠️ Default"
-        bl1, bl2, bl3 = st.columns(3)
-        bl1.metric("Baseline Annual TV", f"AED {baseline_tv / 1_000_000:.1f}B", src_tag)
-        bl2.metric("Baseline ADTV", f"AED {baseline_adtv / 1_000:.1f}M / day", f"{equities_trading_days} trading days")
-        bl3.metric("Commission Rate", f"{baseline_rate:.1f} bps", f"Annual income: {fmt_smart(baseline_comm)}")
-        
-        if not has_bulletin:
-            st.warning("No bulletin uploaded — using default baseline. Upload a DFM Trading Bulletin for actual traded value.")
-        
-        st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-        
-        # ── Section A — Driver Inputs (Capital × Turnover) ────────────
-        st.markdown("#### Strategic Growth Drivers")
-        st.markdown("*Each driver derives incremental ADTV from its own capital × turnover assumptions. Toggle each driver on/off to include or exclude it from the scenario total.*")
-        
-        # ===================== Driver 1: New Listed Products =====================
-        d1_col, d2_col = st.columns(2)
-        
-        with d1_col:
-            st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 1</div>'
-                        '<div style="font-weight:600;font-size:1.1rem">New Listed Products</div>'
-                        '<div style="color:#666;font-size:0.8rem">ETFs / ETPs / Structured Notes</div></div>',
-                        unsafe_allow_html=True)
-            
-            inc_d1 = st.checkbox("Include in total", value=True, key="tv_inc_d1")
-            
-            st.caption("**Formula:** ADTV = AUM × Daily Turnover %")
-            st.caption("**AUM** — Total assets under management of new products  \n"
-                       "**Daily Turnover** — % of AUM that trades each day")
-            
-            p1c1, p1c2 = st.columns(2)
-            with p1c1:
-                prod_aum = st.number_input(
-                    "AUM (AED M)", 0.0, 500_000.0, 0.0, 50.0,
-                    key="tv_prod_aum",
-                )
-            with p1c2:
-                prod_turnover = st.number_input(
-                    "Daily turnover (% of AUM)", 0.0, 50.0, 0.5, 0.1,
-                    key="tv_prod_turn",
-                )
-            
-            # AUM in AED M → ×1e6 to get AED
-            d1_adtv_aed = prod_aum * 1_000_000 * (prod_turnover / 100)
-            d1_adtv_thous = d1_adtv_aed / 1000
-            d1_annual_thous = d1_adtv_thous * equities_trading_days
-            
-            if d1_adtv_thous > 0:
-                st.markdown(f"**→ ADTV: AED {d1_adtv_thous / 1_000:.1f}M / day  |  Annual: AED {d1_annual_thous / 1_000_000:.1f}B**")
-            else:
-                st.caption("*Set inputs above to see implied ADTV*")
-        
-        # ===================== Driver 2: Digital Assets =====================
-        with d2_col:
-            st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 2</div>'
-                        '<div style="font-weight:600;font-size:1.1rem">Digital Assets</div>'
-                        '<div style="color:#666;font-size:0.8rem">Crypto / tokenised securities</div></div>',
-                        unsafe_allow_html=True)
-            
-            inc_d2 = st.checkbox("Include in total", value=False, key="tv_inc_d2")
-            
-            st.caption("**Formula:** ADTV = Active Traders × Trades per Day × Avg Trade Size")
-            st.caption("**Active Traders** — Number of traders active per day  \n"
-                       "**Trades / Day** — Avg number of trades each trader makes per day  \n"
-                       "**Avg Trade Size** — Average value of a single trade in AED")
-            
-            p2c1, p2c2, p2c3 = st.columns(3)
-            with p2c1:
-                digi_traders = st.number_input(
-                    "Active traders", 0, 5_000_000, 0, 500,
-                    key="tv_digi_traders",
-                )
-            with p2c2:
-                digi_trades_day = st.number_input(
-                    "Trades / trader / day", 0.0, 10_000.0, 2.0, 1.0,
-                    key="tv_digi_tpd",
-                )
-            with p2c3:
-                digi_avg_size = st.number_input(
-                    "Avg trade size (AED)", 0.0, 10_000_000.0, 5000.0, 1000.0,
-                    key="tv_digi_size", format="%.0f",
-                )
-            
-            d2_adtv_aed = digi_traders * digi_trades_day * digi_avg_size
-            d2_adtv_thous = d2_adtv_aed / 1000
-            d2_annual_thous = d2_adtv_thous * equities_trading_days
-            
-            if d2_adtv_thous > 0:
-                tag = "" if inc_d2 else " *(excluded)*"
-                st.markdown(f"**→ ADTV: AED {d2_adtv_thous / 1_000:.1f}M / day  |  Annual: AED {d2_annual_thous / 1_000_000:.1f}B**{tag}")
-            else:
-                st.caption("*Set inputs above to see implied ADTV*")
-        
-        st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-        
-        # ===================== Driver 3: SLB + Financing Rails =====================
-        d3_col, d4_col = st.columns(2)
-        
-        with d3_col:
-            st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 3</div>'
-                        '<div style="font-weight:600;font-size:1.1rem">SLB + Financing Rails</div>'
-                        '<div style="color:#666;font-size:0.8rem">Securities lending, borrowing, margin</div></div>',
-                        unsafe_allow_html=True)
-            
-            inc_d3 = st.checkbox("Include in total", value=True, key="tv_inc_d3")
-            
-            st.caption("**Formula:** Loan = Pledged × LTV% → Invested = Loan × Utilisation% → ADTV = Invested × Daily Turnover%")
-            st.caption("**Securities Pledged** — Value of securities posted as collateral  \n"
-                       "**Loan-to-Value** — % of collateral the lender will lend  \n"
-                       "**Utilisation into DFM** — % of the loan used to buy DFM stocks  \n"
-                       "**Daily Turnover** — How often the invested capital trades per day")
-            
-            p3c1, p3c2 = st.columns(2)
-            with p3c1:
-                slb_pledged = st.number_input(
-                    "Securities pledged (AED M)", 0.0, 500_000.0, 0.0, 50.0,
-                    key="tv_slb_pledged",
-                )
-                slb_ltv = st.number_input(
-                    "Loan-to-value (%)", 0.0, 100.0, 90.0, 5.0,
-                    key="tv_slb_ltv",
-                )
-            with p3c2:
-                slb_util = st.number_input(
-                    "Utilisation into DFM (%)", 0.0, 100.0, 50.0, 5.0,
-                    key="tv_slb_util",
-                )
-                slb_daily_turn = st.number_input(
-                    "Daily turnover on invested (%)", 0.0, 100.0, 1.0, 0.5,
-                    key="tv_slb_turn",
-                )
-            
-            # Chain: Pledged → Loan → Invested in DFM → Daily Turnover
-            slb_loan = slb_pledged * 1_000_000 * (slb_ltv / 100)
-            slb_invested = slb_loan * (slb_util / 100)
-            d3_adtv_aed = slb_invested * (slb_daily_turn / 100)
-            d3_adtv_thous = d3_adtv_aed / 1000
-            d3_annual_thous = d3_adtv_thous * equities_trading_days
-            
-            if slb_pledged > 0:
-                st.caption(f"Loan: AED {slb_loan / 1e6:.1f}M → Invested in DFM: AED {slb_invested / 1e6:.1f}M")
-                st.markdown(f"**→ ADTV: AED {d3_adtv_thous / 1_000:.1f}M / day  |  Annual: AED {d3_annual_thous / 1_000_000:.1f}B**")
-            else:
-                st.caption("*Set inputs above to see implied ADTV*")
-        
-        # ===================== Driver 4: Investor Access Expansion =====================
-        with d4_col:
-            st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 4</div>'
-                        '<div style="font-weight:600;font-size:1.1rem">Investor Access Expansion</div>'
-                        '<div style="color:#666;font-size:0.8rem">New investors, platforms, corridors</div></div>',
-                        unsafe_allow_html=True)
-            
-            inc_d4 = st.checkbox("Include in total", value=True, key="tv_inc_d4")
-            
-            st.caption("**Formula:** ADTV = Investors × Capital per Investor × Daily Turnover%")
-            st.caption("**New Active Investors** — Number of new investors entering the market  \n"
-                       "**Avg Capital per Investor** — Average capital each investor brings to DFM  \n"
-                       "**Daily Turnover** — % of capital that trades each day")
-            
-            p4c1, p4c2, p4c3 = st.columns(3)
-            with p4c1:
-                acc_investors = st.number_input(
-                    "New active investors", 0, 10_000_000, 0, 1000,
-                    key="tv_acc_inv",
-                )
-            with p4c2:
-                acc_capital = st.number_input(
-                    "Avg capital / investor (AED)", 0.0, 100_000_000.0, 1000.0, 500.0,
-                    key="tv_acc_cap", format="%.0f",
-                )
-            with p4c3:
-                acc_daily_turn = st.number_input(
-                    "Daily turnover (%)", 0.0, 100.0, 0.5, 0.1,
-                    key="tv_acc_turn",
-                )
-            
-            d4_total_capital = acc_investors * acc_capital
-            d4_adtv_aed = d4_total_capital * (acc_daily_turn / 100)
-            d4_adtv_thous = d4_adtv_aed / 1000
-            d4_annual_thous = d4_adtv_thous * equities_trading_days
-            
-            if acc_investors > 0:
-                st.caption(f"Total capital: AED {d4_total_capital / 1e6:.1f}M")
-                st.markdown(f"**→ ADTV: AED {d4_adtv_thous / 1_000:.1f}M / day  |  Annual: AED {d4_annual_thous / 1_000_000:.1f}B**")
-            else:
-                st.caption("*Set inputs above to see implied ADTV*")
-        
-        st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-        
-        # ===================== Driver 5: New Listings / Free-Float Growth =====================
-        d5_col, vol_col = st.columns(2)
-        
-        with d5_col:
-            st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 5</div>'
-                        '<div style="font-weight:600;font-size:1.1rem">New Listings / Free-Float Growth</div>'
-                        '<div style="color:#666;font-size:0.8rem">IPOs, secondary offerings, index inclusion</div></div>',
-                        unsafe_allow_html=True)
-            
-            inc_d5 = st.checkbox("Include in total", value=True, key="tv_inc_d5")
-            
-            st.caption("**Formula:** Annual TV = Free-Float Mcap × Velocity → ADTV = Annual TV / Trading Days")
-            st.caption("**Free-Float Mcap** — Incremental market cap available for trading  \n"
-                       "**Turnover Velocity** — Times per year the free-float turns over (0.5× = 50%)")
-            
-            p5c1, p5c2 = st.columns(2)
-            with p5c1:
-                ff_mcap = st.number_input(
-                    "Incremental free-float mcap (AED M)", 0.0, 500_000.0, 0.0, 100.0,
-                    key="tv_ff_mcap",
-                )
-            with p5c2:
-                ff_velocity = st.number_input(
-                    "Annual turnover velocity (x)", 0.0, 10.0, 0.5, 0.1,
-                    key="tv_ff_vel",
-                )
-            
-            # AED M → ×1e6, annual → daily
-            d5_annual_aed = ff_mcap * 1_000_000 * ff_velocity
-            d5_adtv_aed = d5_annual_aed / equities_trading_days if equities_trading_days > 0 else 0
-            d5_adtv_thous = d5_adtv_aed / 1000
-            d5_annual_thous = d5_adtv_thous * equities_trading_days
-            
-            if ff_mcap > 0:
-                st.markdown(f"**→ Annual: AED {d5_annual_thous / 1_000_000:.1f}B  |  ADTV: AED {d5_adtv_thous / 1_000:.1f}M / day**")
-            else:
-                st.caption("*Set inputs above to see implied ADTV*")
-        
-        # ===================== Volatility / Market Multiplier =====================
-        with vol_col:
-            st.markdown('<div class="metric-card-highlight"><div class="metric-label">Market Multiplier</div>'
-                        '<div style="font-weight:600;font-size:1.1rem">Volatility / Market Activity</div>'
-                        '<div style="color:#666;font-size:0.8rem">Scales total ADTV (baseline + drivers)</div></div>',
-                        unsafe_allow_html=True)
-            
-            st.caption("**This is not a driver.** It multiplies the combined total (baseline + all included drivers) "
-                       "to model higher or lower overall market activity.")
-            
-            vol_multiplier = st.number_input(
-                "Multiplier", 0.10, 5.00, 1.00, 0.05,
-                key="tv_vol_mult",
-                help="1.00 = no change. 1.20 = 20% more activity. 0.80 = 20% lower.",
+    # ── Baseline ──────────────────────────────────────────────────
+    baseline_tv = base.total_traded_value  # AED'000
+    baseline_rate = base.comm_rate          # bps
+    baseline_comm = base.comm_annual        # AED'000
+    has_bulletin = bul is not None
+    
+    equities_trading_days = st.number_input(
+        "Equities trading days per year", 200, 300, base.trading_days, 1,
+        key="tv_trading_days",
+    )
+    baseline_adtv = baseline_tv / equities_trading_days if equities_trading_days > 0 else 0  # AED'000
+    
+    src_tag = "📊 Bulletin" if has_bulletin else "⚠️ Default"
+    bl1, bl2, bl3 = st.columns(3)
+    bl1.metric("Baseline Annual TV", fmt_b(baseline_tv), src_tag)
+    bl2.metric("Baseline ADTV", f"{fmt_m(baseline_adtv)} / day", f"{equities_trading_days} trading days")
+    bl3.metric("Commission Rate", f"{baseline_rate:.1f} bps", f"Annual income: {fmt_smart(baseline_comm)}")
+    
+    if not has_bulletin:
+        st.warning("No bulletin uploaded — using default baseline. Upload a DFM Trading Bulletin for actual traded value.")
+    
+    section_divider()
+    
+    # ── Section A — Driver Inputs (Capital × Turnover) ────────────
+    st.markdown("#### Strategic Growth Drivers")
+    st.markdown("*Each driver derives incremental ADTV from its own capital × turnover assumptions. Toggle each driver on/off to include or exclude it from the scenario total.*")
+    
+    # ===================== Driver 1: New Listed Products =====================
+    d1_col, d2_col = st.columns(2)
+    
+    with d1_col:
+        st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 1</div>'
+                    '<div style="font-weight:600;font-size:1.1rem">New Listed Products</div>'
+                    '<div style="color:#666;font-size:0.8rem">ETFs / ETPs / Structured Notes</div></div>',
+                    unsafe_allow_html=True)
+        
+        inc_d1 = st.checkbox("Include in total", value=True, key="tv_inc_d1")
+        
+        st.caption("**Formula:** ADTV = AUM × Daily Turnover %")
+        st.caption("**AUM** — Total assets under management of new products  \n"
+                   "**Daily Turnover** — % of AUM that trades each day")
+        
+        p1c1, p1c2 = st.columns(2)
+        with p1c1:
+            prod_aum = st.number_input(
+                "AUM (AED M)", 0.0, 500_000.0, 0.0, 50.0,
+                key="tv_prod_aum",
+            )
+        with p1c2:
+            prod_turnover = st.number_input(
+                "Daily turnover (% of AUM)", 0.0, 50.0, 0.5, 0.1,
+                key="tv_prod_turn",
             )
-            
-            st.markdown('<div class="info-box">'
-                        '<strong>1.00</strong> = no change &nbsp;|&nbsp; '
-                        '<strong>1.20</strong> = +20% activity &nbsp;|&nbsp; '
-                        '<strong>0.80</strong> = -20% activity'
-                        '</div>', unsafe_allow_html=True)
-        
-        # ── Core Math ─────────────────────────────────────────────────
-        # Additive delta: sum only included drivers
-        delta_additive = 0.0
-        if inc_d1:
-            delta_additive += d1_adtv_thous
-        if inc_d2:
-            delta_additive += d2_adtv_thous
-        if inc_d3:
-            delta_additive += d3_adtv_thous
-        if inc_d4:
-            delta_additive += d4_adtv_thous
-        if inc_d5:
-            delta_additive += d5_adtv_thous
-        
-        adtv_pre_vol = baseline_adtv + delta_additive  # AED'000/day
-        scenario_adtv = adtv_pre_vol * vol_multiplier   # AED'000/day
-        
-        # Derived volatility impact (for table row)
-        delta_adtv_vol = scenario_adtv - adtv_pre_vol  # AED'000/day
-        delta_annual_vol = delta_adtv_vol * equities_trading_days  # AED'000/year
-        
-        scenario_annual_tv = scenario_adtv * equities_trading_days  # AED'000/year
-        delta_annual_total = scenario_annual_tv - baseline_tv  # AED'000/year
-        
-        # Commission
-        scenario_comm = calc_comm(scenario_annual_tv, baseline_rate)
-        delta_comm = scenario_comm - baseline_comm
-        comm_pct = (delta_comm / baseline_comm * 100) if baseline_comm > 0 else 0
-        
-        # ── Section C — Driver Contribution Breakdown ─────────────────
-        st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-        st.markdown("#### Driver Contribution Breakdown")
-        
-        driver_data = [
-            ("New Listed Products",          d1_adtv_thous, d1_annual_thous, inc_d1),
-            ("Digital Assets",               d2_adtv_thous, d2_annual_thous, inc_d2),
-            ("SLB + Financing Rails",        d3_adtv_thous, d3_annual_thous, inc_d3),
-            ("Investor Access Expansion",    d4_adtv_thous, d4_annual_thous, inc_d4),
-            ("New Listings / Free-Float",    d5_adtv_thous, d5_annual_thous, inc_d5),
-        ]
-        
-        driver_rows = []
-        subtotal_adtv = 0.0
-        subtotal_annual = 0.0
-        
-        for name, adtv_k, annual_k, included in driver_data:
-            adtv_m = adtv_k / 1_000
-            annual_b = annual_k / 1_000_000
-            comm_impact_k = annual_k * baseline_rate / 10000
-            comm_impact_m = comm_impact_k / 1_000
-            
-            if included:
-                subtotal_adtv += adtv_k
-                subtotal_annual += annual_k
-            
-            label = name if included else f"{name} *(excluded)*"
-            
-            driver_rows.append({
-                'Driver': label,
-                'ADTV (AED M/day)': f"{adtv_m:+,.1f}" if abs(adtv_m) > 0.05 else "—",
-                'Annual (AED B/yr)': f"{annual_b:+,.1f}" if abs(annual_b) > 0.05 else "—",
-                'Commission (AED M/yr)': f"{comm_impact_m:+,.1f}" if abs(comm_impact_m) > 0.05 and included else "—",
-            })
         
-        # Subtotal row
-        sub_adtv_m = subtotal_adtv / 1_000
-        sub_annual_b = subtotal_annual / 1_000_000
-        sub_comm_m = subtotal_annual * baseline_rate / 10000 / 1_000
+        # AUM in AED M → ×1e6 to get AED
+        d1_adtv_aed = prod_aum * 1_000_000 * (prod_turnover / 100)
+        d1_adtv_thous = d1_adtv_aed / 1000
+        d1_annual_thous = d1_adtv_thous * equities_trading_days
         
-        driver_rows.append({
-            'Driver': '**Subtotal (included drivers)**',
-            'ADTV (AED M/day)': f"{sub_adtv_m:+,.1f}",
-            'Annual (AED B/yr)': f"{sub_annual_b:+,.1f}",
-            'Commission (AED M/yr)': f"{sub_comm_m:+,.1f}",
-        })
+        if d1_adtv_thous > 0:
+            st.markdown(f"**→ ADTV: {fmt_m(d1_adtv_thous)} / day  |  Annual: {fmt_b(d1_annual_thous)}**")
+        else:
+            st.caption("*Set inputs above to see implied ADTV*")
+    
+    # ===================== Driver 2: Digital Assets =====================
+    with d2_col:
+        st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 2</div>'
+                    '<div style="font-weight:600;font-size:1.1rem">Digital Assets</div>'
+                    '<div style="color:#666;font-size:0.8rem">Crypto / tokenised securities</div></div>',
+                    unsafe_allow_html=True)
+        
+        inc_d2 = st.checkbox("Include in total", value=False, key="tv_inc_d2")
+        
+        st.caption("**Formula:** ADTV = Active Traders × Trades per Day × Avg Trade Size")
+        st.caption("**Active Traders** — Number of traders active per day  \n"
+                   "**Trades / Day** — Avg number of trades each trader makes per day  \n"
+                   "**Avg Trade Size** — Average value of a single trade in AED")
+        
+        p2c1, p2c2, p2c3 = st.columns(3)
+        with p2c1:
+            digi_traders = st.number_input(
+                "Active traders", 0, 5_000_000, 0, 500,
+                key="tv_digi_traders",
+            )
+        with p2c2:
+            digi_trades_day = st.number_input(
+                "Trades / trader / day", 0.0, 10_000.0, 2.0, 1.0,
+                key="tv_digi_tpd",
+            )
+        with p2c3:
+            digi_avg_size = st.number_input(
+                "Avg trade size (AED)", 0.0, 10_000_000.0, 5000.0, 1000.0,
+                key="tv_digi_size", format="%.0f",
+            )
         
-        # Volatility impact row
-        vol_adtv_m = delta_adtv_vol / 1_000
-        vol_annual_b = delta_annual_vol / 1_000_000
-        vol_comm_m = delta_annual_vol * baseline_rate / 10000 / 1_000
+        d2_adtv_aed = digi_traders * digi_trades_day * digi_avg_size
+        d2_adtv_thous = d2_adtv_aed / 1000
+        d2_annual_thous = d2_adtv_thous * equities_trading_days
+        
+        if d2_adtv_thous > 0:
+            tag = "" if inc_d2 else " *(excluded)*"
+            st.markdown(f"**→ ADTV: {fmt_m(d2_adtv_thous)} / day  |  Annual: {fmt_b(d2_annual_thous)}**{tag}")
+        else:
+            st.caption("*Set inputs above to see implied ADTV*")
+    
+    section_divider()
+    
+    # ===================== Driver 3: SLB + Financing Rails =====================
+    d3_col, d4_col = st.columns(2)
+    
+    with d3_col:
+        st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 3</div>'
+                    '<div style="font-weight:600;font-size:1.1rem">SLB + Financing Rails</div>'
+                    '<div style="color:#666;font-size:0.8rem">Securities lending, borrowing, margin</div></div>',
+                    unsafe_allow_html=True)
+        
+        inc_d3 = st.checkbox("Include in total", value=True, key="tv_inc_d3")
+        
+        st.caption("**Formula:** Loan = Pledged × LTV% → Invested = Loan × Utilisation% → ADTV = Invested × Daily Turnover%")
+        st.caption("**Securities Pledged** — Value of securities posted as collateral  \n"
+                   "**Loan-to-Value** — % of collateral the lender will lend  \n"
+                   "**Utilisation into DFM** — % of the loan used to buy DFM stocks  \n"
+                   "**Daily Turnover** — How often the invested capital trades per day")
+        
+        p3c1, p3c2 = st.columns(2)
+        with p3c1:
+            slb_pledged = st.number_input(
+                "Securities pledged (AED M)", 0.0, 500_000.0, 0.0, 50.0,
+                key="tv_slb_pledged",
+            )
+            slb_ltv = st.number_input(
+                "Loan-to-value (%)", 0.0, 100.0, 90.0, 5.0,
+                key="tv_slb_ltv",
+            )
+        with p3c2:
+            slb_util = st.number_input(
+                "Utilisation into DFM (%)", 0.0, 100.0, 50.0, 5.0,
+                key="tv_slb_util",
+            )
+            slb_daily_turn = st.number_input(
+                "Daily turnover on invested (%)", 0.0, 100.0, 1.0, 0.5,
+                key="tv_slb_turn",
+            )
+        
+        # Chain: Pledged → Loan → Invested in DFM → Daily Turnover
+        slb_loan = slb_pledged * 1_000_000 * (slb_ltv / 100)
+        slb_invested = slb_loan * (slb_util / 100)
+        d3_adtv_aed = slb_invested * (slb_daily_turn / 100)
+        d3_adtv_thous = d3_adtv_aed / 1000
+        d3_annual_thous = d3_adtv_thous * equities_trading_days
+        
+        if slb_pledged > 0:
+            st.caption(f"Loan: AED {slb_loan / 1e6:.1f}M → Invested in DFM: AED {slb_invested / 1e6:.1f}M")
+            st.markdown(f"**→ ADTV: {fmt_m(d3_adtv_thous)} / day  |  Annual: {fmt_b(d3_annual_thous)}**")
+        else:
+            st.caption("*Set inputs above to see implied ADTV*")
+    
+    # ===================== Driver 4: Investor Access Expansion =====================
+    with d4_col:
+        st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 4</div>'
+                    '<div style="font-weight:600;font-size:1.1rem">Investor Access Expansion</div>'
+                    '<div style="color:#666;font-size:0.8rem">New investors, platforms, corridors</div></div>',
+                    unsafe_allow_html=True)
+        
+        inc_d4 = st.checkbox("Include in total", value=True, key="tv_inc_d4")
+        
+        st.caption("**Formula:** ADTV = Investors × Capital per Investor × Daily Turnover%")
+        st.caption("**New Active Investors** — Number of new investors entering the market  \n"
+                   "**Avg Capital per Investor** — Average capital each investor brings to DFM  \n"
+                   "**Daily Turnover** — % of capital that trades each day")
+        
+        p4c1, p4c2, p4c3 = st.columns(3)
+        with p4c1:
+            acc_investors = st.number_input(
+                "New active investors", 0, 10_000_000, 0, 1000,
+                key="tv_acc_inv",
+            )
+        with p4c2:
+            acc_capital = st.number_input(
+                "Avg capital / investor (AED)", 0.0, 100_000_000.0, 1000.0, 500.0,
+                key="tv_acc_cap", format="%.0f",
+            )
+        with p4c3:
+            acc_daily_turn = st.number_input(
+                "Daily turnover (%)", 0.0, 100.0, 0.5, 0.1,
+                key="tv_acc_turn",
+            )
+        
+        d4_total_capital = acc_investors * acc_capital
+        d4_adtv_aed = d4_total_capital * (acc_daily_turn / 100)
+        d4_adtv_thous = d4_adtv_aed / 1000
+        d4_annual_thous = d4_adtv_thous * equities_trading_days
+        
+        if acc_investors > 0:
+            st.caption(f"Total capital: AED {d4_total_capital / 1e6:.1f}M")
+            st.markdown(f"**→ ADTV: {fmt_m(d4_adtv_thous)} / day  |  Annual: {fmt_b(d4_annual_thous)}**")
+        else:
+            st.caption("*Set inputs above to see implied ADTV*")
+    
+    section_divider()
+    
+    # ===================== Driver 5: New Listings / Free-Float Growth =====================
+    d5_col, vol_col = st.columns(2)
+    
+    with d5_col:
+        st.markdown('<div class="metric-card-highlight"><div class="metric-label">Driver 5</div>'
+                    '<div style="font-weight:600;font-size:1.1rem">New Listings / Free-Float Growth</div>'
+                    '<div style="color:#666;font-size:0.8rem">IPOs, secondary offerings, index inclusion</div></div>',
+                    unsafe_allow_html=True)
+        
+        inc_d5 = st.checkbox("Include in total", value=True, key="tv_inc_d5")
+        
+        st.caption("**Formula:** Annual TV = Free-Float Mcap × Velocity → ADTV = Annual TV / Trading Days")
+        st.caption("**Free-Float Mcap** — Incremental market cap available for trading  \n"
+                   "**Turnover Velocity** — Times per year the free-float turns over (0.5× = 50%)")
+        
+        p5c1, p5c2 = st.columns(2)
+        with p5c1:
+            ff_mcap = st.number_input(
+                "Incremental free-float mcap (AED M)", 0.0, 500_000.0, 0.0, 100.0,
+                key="tv_ff_mcap",
+            )
+        with p5c2:
+            ff_velocity = st.number_input(
+                "Annual turnover velocity (x)", 0.0, 10.0, 0.5, 0.1,
+                key="tv_ff_vel",
+            )
+        
+        # AED M → ×1e6, annual → daily
+        d5_annual_aed = ff_mcap * 1_000_000 * ff_velocity
+        d5_adtv_aed = d5_annual_aed / equities_trading_days if equities_trading_days > 0 else 0
+        d5_adtv_thous = d5_adtv_aed / 1000
+        d5_annual_thous = d5_adtv_thous * equities_trading_days
+        
+        if ff_mcap > 0:
+            st.markdown(f"**→ Annual: {fmt_b(d5_annual_thous)}  |  ADTV: {fmt_m(d5_adtv_thous)} / day**")
+        else:
+            st.caption("*Set inputs above to see implied ADTV*")
+    
+    # ===================== Volatility / Market Multiplier =====================
+    with vol_col:
+        st.markdown('<div class="metric-card-highlight"><div class="metric-label">Market Multiplier</div>'
+                    '<div style="font-weight:600;font-size:1.1rem">Volatility / Market Activity</div>'
+                    '<div style="color:#666;font-size:0.8rem">Scales total ADTV (baseline + drivers)</div></div>',
+                    unsafe_allow_html=True)
+        
+        st.caption("**This is not a driver.** It multiplies the combined total (baseline + all included drivers) "
+                   "to model higher or lower overall market activity.")
+        
+        vol_multiplier = st.number_input(
+            "Multiplier", 0.10, 5.00, 1.00, 0.05,
+            key="tv_vol_mult",
+            help="1.00 = no change. 1.20 = 20% more activity. 0.80 = 20% lower.",
+        )
+        
+        st.markdown('<div class="info-box">'
+                    '<strong>1.00</strong> = no change &nbsp;|&nbsp; '
+                    '<strong>1.20</strong> = +20% activity &nbsp;|&nbsp; '
+                    '<strong>0.80</strong> = -20% activity'
+                    '</div>', unsafe_allow_html=True)
+    
+    # ── Core Math ─────────────────────────────────────────────────
+    # Additive delta: sum only included drivers
+    delta_additive = 0.0
+    if inc_d1:
+        delta_additive += d1_adtv_thous
+    if inc_d2:
+        delta_additive += d2_adtv_thous
+    if inc_d3:
+        delta_additive += d3_adtv_thous
+    if inc_d4:
+        delta_additive += d4_adtv_thous
+    if inc_d5:
+        delta_additive += d5_adtv_thous
+    
+    adtv_pre_vol = baseline_adtv + delta_additive  # AED'000/day
+    scenario_adtv = adtv_pre_vol * vol_multiplier   # AED'000/day
+    
+    # Derived volatility impact (for table row)
+    delta_adtv_vol = scenario_adtv - adtv_pre_vol  # AED'000/day
+    delta_annual_vol = delta_adtv_vol * equities_trading_days  # AED'000/year
+    
+    scenario_annual_tv = scenario_adtv * equities_trading_days  # AED'000/year
+    delta_annual_total = scenario_annual_tv - baseline_tv  # AED'000/year
+    
+    # Commission
+    scenario_comm = calc_comm(scenario_annual_tv, baseline_rate)
+    delta_comm = scenario_comm - baseline_comm
+    comm_pct = (delta_comm / baseline_comm * 100) if baseline_comm > 0 else 0
+    
+    # ── Section C — Driver Contribution Breakdown ─────────────────
+    section_divider()
+    st.markdown("#### Driver Contribution Breakdown")
+    
+    driver_data = [
+        ("New Listed Products",          d1_adtv_thous, d1_annual_thous, inc_d1),
+        ("Digital Assets",               d2_adtv_thous, d2_annual_thous, inc_d2),
+        ("SLB + Financing Rails",        d3_adtv_thous, d3_annual_thous, inc_d3),
+        ("Investor Access Expansion",    d4_adtv_thous, d4_annual_thous, inc_d4),
+        ("New Listings / Free-Float",    d5_adtv_thous, d5_annual_thous, inc_d5),
+    ]
+    
+    driver_rows = []
+    subtotal_adtv = 0.0
+    subtotal_annual = 0.0
+    
+    for name, adtv_k, annual_k, included in driver_data:
+        adtv_m = adtv_k / 1_000
+        annual_b = annual_k / 1_000_000
+        comm_impact_k = annual_k * baseline_rate / 10000
+        comm_impact_m = comm_impact_k / 1_000
+        
+        if included:
+            subtotal_adtv += adtv_k
+            subtotal_annual += annual_k
+        
+        label = name if included else f"{name} *(excluded)*"
         
         driver_rows.append({
-            'Driver': f'Volatility / market activity (x{vol_multiplier:.2f})',
-            'ADTV (AED M/day)': f"{vol_adtv_m:+,.1f}" if abs(vol_adtv_m) > 0.05 else "—",
-            'Annual (AED B/yr)': f"{vol_annual_b:+,.1f}" if abs(vol_annual_b) > 0.05 else "—",
-            'Commission (AED M/yr)': f"{vol_comm_m:+,.1f}" if abs(vol_comm_m) > 0.05 else "—",
+            'Driver': label,
+            'ADTV (AED M/day)': f"{adtv_m:+,.1f}" if abs(adtv_m) > 0.05 else "—",
+            'Annual (AED B/yr)': f"{annual_b:+,.1f}" if abs(annual_b) > 0.05 else "—",
+            'Commission (AED M/yr)': f"{comm_impact_m:+,.1f}" if abs(comm_impact_m) > 0.05 and included else "—",
         })
+    
+    # Subtotal row
+    sub_adtv_m = subtotal_adtv / 1_000
+    sub_annual_b = subtotal_annual / 1_000_000
+    sub_comm_m = subtotal_annual * baseline_rate / 10000 / 1_000
+    
+    driver_rows.append({
+        'Driver': '**Subtotal (included drivers)**',
+        'ADTV (AED M/day)': f"{sub_adtv_m:+,.1f}",
+        'Annual (AED B/yr)': f"{sub_annual_b:+,.1f}",
+        'Commission (AED M/yr)': f"{sub_comm_m:+,.1f}",
+    })
+    
+    # Volatility impact row
+    vol_adtv_m = delta_adtv_vol / 1_000
+    vol_annual_b = delta_annual_vol / 1_000_000
+    vol_comm_m = delta_annual_vol * baseline_rate / 10000 / 1_000
+    
+    driver_rows.append({
+        'Driver': f'Volatility / market activity (x{vol_multiplier:.2f})',
+        'ADTV (AED M/day)': f"{vol_adtv_m:+,.1f}" if abs(vol_adtv_m) > 0.05 else "—",
+        'Annual (AED B/yr)': f"{vol_annual_b:+,.1f}" if abs(vol_annual_b) > 0.05 else "—",
+        'Commission (AED M/yr)': f"{vol_comm_m:+,.1f}" if abs(vol_comm_m) > 0.05 else "—",
+    })
+    
+    # TOTAL row
+    total_adtv_m = (scenario_adtv - baseline_adtv) / 1_000
+    total_annual_b = delta_annual_total / 1_000_000
+    total_comm_m = delta_comm / 1_000
+    
+    driver_rows.append({
+        'Driver': '**TOTAL**',
+        'ADTV (AED M/day)': f"{total_adtv_m:+,.1f}",
+        'Annual (AED B/yr)': f"{total_annual_b:+,.1f}",
+        'Commission (AED M/yr)': f"{total_comm_m:+,.1f}",
+    })
+    
+    st.table(pd.DataFrame(driver_rows).set_index('Driver'))
+    
+    # ── Section D — Scenario Summary ──────────────────────────────
+    section_divider()
+    st.markdown("#### Scenario Summary")
+    
+    k1, k2, k3, k4 = st.columns(4)
+    delta_tv_pct = (delta_annual_total / baseline_tv * 100) if baseline_tv > 0 else 0
+    k1.metric(
+        "Annual Traded Value",
+        fmt_b(scenario_annual_tv),
+        f"{delta_annual_total / 1_000_000:+.1f}B ({delta_tv_pct:+.1f}%)" if abs(delta_annual_total) > 0.5 else "—",
+    )
+    k2.metric(
+        "ADTV",
+        f"{fmt_m(scenario_adtv)} / day",
+        f"{(scenario_adtv - baseline_adtv) / 1_000:+.1f}M" if abs(scenario_adtv - baseline_adtv) > 0.5 else "—",
+    )
+    k3.metric(
+        "Commission Income",
+        fmt_smart(scenario_comm),
+        f"{delta_comm / 1_000:+.1f}M ({comm_pct:+.1f}%)" if abs(delta_comm) > 0.5 else "—",
+        delta_color="normal",
+    )
+    k4.metric(
+        "Commission Rate",
+        f"{baseline_rate:.1f} bps",
+        "unchanged",
+    )
+    
+    # Summary table
+    sum_df = _tv_summary_df(baseline_tv, baseline_adtv, baseline_comm, scenario_annual_tv, scenario_adtv, scenario_comm)
+    st.table(sum_df.set_index('Metric'))
+    
+    # Bar chart: Baseline vs Scenario Annual TV
+    if abs(delta_annual_total) > 0.5:
+        fig_tv = _memo_figure('tv_fig', (baseline_tv, scenario_annual_tv), _tv_bar_figure)
+        st.plotly_chart(fig_tv, use_container_width=True)
+
+@st.fragment
+def _interest_rate_tab(base):
+    """Tab 3: interest rate scenario on the EaR portfolio"""
+    st.markdown("### Interest Rate Scenario")
+    st.markdown("*What if interest rates change? Uses Earnings-at-Risk portfolio (deposits + amortised cost + FVTOCI sukuk)*")
+    
+    col_in, col_out = st.columns([1, 2])
+    
+    with col_in:
+        st.markdown("#### Scenario Inputs")
         
-        # TOTAL row
-        total_adtv_m = (scenario_adtv - baseline_adtv) / 1_000
-        total_annual_b = delta_annual_total / 1_000_000
-        total_comm_m = delta_comm / 1_000
+        port_b = base.ear_portfolio / 1_000_000
+        portfolio = st.number_input("EaR Portfolio (AED B)", 0.5, 20.0, clamp(port_b, 0.5, 20.0, 4.9), 0.1, key="t3_port") * 1_000_000
         
-        driver_rows.append({
-            'Driver': '**TOTAL**',
-            'ADTV (AED M/day)': f"{total_adtv_m:+,.1f}",
-            'Annual (AED B/yr)': f"{total_annual_b:+,.1f}",
-            'Commission (AED M/yr)': f"{total_comm_m:+,.1f}",
+        cur_rate = st.number_input("Current Rate (%)", 0.0, 15.0, 5.0, 0.25, key="t3_cur_rate")
+        
+        rate_chg = st.selectbox("Rate Change", RATE_CHANGE_OPTIONS, index=4, key="t3_chg")
+        new_rate = max(0, cur_rate + RATE_CHANGES[rate_chg])
+        
+        st.info(f"New Rate: **{new_rate:.2f}%**")
+    
+    with col_out:
+        st.markdown("#### Impact Analysis")
+        
+        cur_inc = calc_inv(portfolio, cur_rate)
+        new_inc = calc_inv(portfolio, new_rate)
+        diff = new_inc - cur_inc
+        pct_str = f"{(diff / cur_inc * 100):+.1f}%" if cur_inc > 0 else "—"
+        
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Current Income", fmt_smart(cur_inc), f"@ {cur_rate:.2f}%")
+        m2.metric("Scenario Income", fmt_smart(new_inc), f"@ {new_rate:.2f}%")
+        m3.metric("Annual Impact", fmt_smart(diff), pct_str, delta_color="normal")
+        
+        st.markdown(f'<div class="info-box"><strong>Calculation:</strong><br>{fmt_smart(portfolio)} × {RATE_CHANGES[rate_chg]*100:+.0f} bps = <strong>{fmt_smart(diff)}</strong> annual impact</div>', unsafe_allow_html=True)
+        
+        # Sensitivity table
+        st.table(_rate_sensitivity_df(portfolio, cur_rate).set_index('Rate Δ').style.format({'New Rate': '{:.2f}%', 'Income': fmt_smart, 'Impact': fmt_smart}))
+
+@st.fragment
+def _combined_tab(base):
+    """Tab 4: combined fee, traded value and rate scenario"""
+    st.markdown("### Combined Scenario")
+    st.markdown("*Model multiple changes together*")
+    
+    col_in, col_out = st.columns([1, 1])
+    
+    with col_in:
+        st.markdown("#### Scenario Inputs")
+        
+        tv_b = base.total_traded_value / 1_000_000
+        comb_tv = st.number_input("Traded Value (AED B)", 1.0, 1000.0, clamp(tv_b, 1.0, 1000.0, 165.0), 5.0, key="t4_tv") * 1_000_000
+        comb_rate = st.number_input("Comm Rate (bps)", 1.0, 100.0, clamp(base.comm_rate, 1.0, 100.0, 25.0), 0.5, key="t4_rate")
+        
+        port_b = base.ear_portfolio / 1_000_000
+        comb_port = st.number_input("EaR Portfolio (AED B)", 0.5, 20.0, clamp(port_b, 0.5, 20.0, 4.9), 0.1, key="t4_port") * 1_000_000
+        comb_ir = st.number_input("Interest Rate (%)", 0.0, 15.0, 5.0, 0.25, key="t4_ir")
+    
+    with col_out:
+        st.markdown("#### Results")
+        
+        # Scenario values
+        sc_comm = calc_comm(comb_tv, comb_rate)
+        sc_inv = calc_inv(comb_port, comb_ir)
+        sc_total = sc_comm + sc_inv
+        
+        # Baseline
+        bl_comm = base.comm_annual
+        bl_inv = base.inv_annual
+        bl_total = bl_comm + bl_inv
+        
+        st.table(_combined_revenue_df(bl_comm, bl_inv, sc_comm, sc_inv).set_index('Revenue').style.format(fmt_smart))
+        
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Commission", fmt_smart(sc_comm), fmt_smart(sc_comm - bl_comm))
+        m2.metric("Investment", fmt_smart(sc_inv), fmt_smart(sc_inv - bl_inv))
+        tot_pct = ((sc_total - bl_total) / bl_total * 100) if bl_total > 0 else 0
+        m3.metric("Total Δ", fmt_smart(sc_total - bl_total), f"{tot_pct:+.1f}%")
+        
+        # Waterfall
+        fig = _memo_figure('bridge_fig', (bl_comm, bl_inv, sc_comm, sc_inv), _revenue_bridge_figure)
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def _investment_risk_tab(base, ann_factor):
+    """Tab 5: earnings-at-risk and OCI stress on the investment portfolio"""
+    st.markdown("### Investment Portfolio Risk Analysis")
+    st.markdown("*Two complementary risk lenses for DFM's investment portfolio*")
+    
+    risk_tab1, risk_tab2 = st.tabs(["📈 Earnings Sensitivity (Income)", "📉 Market Value Sensitivity (OCI/P&L)"])
+    
+    # ========== EARNINGS-AT-RISK (P&L) ==========
+    with risk_tab1:
+        st.markdown("#### Earnings-at-Risk: If interest rates change, what happens to DFM's investment income?")
+        st.markdown("*Only assets generating recurring investment income: deposits, amortised cost (sukuk), FVTOCI debt (sukuk)*")
+        
+        # -- Extract values --
+        dep_bal = base.investment_deposits
+        ac_bal = base.investments_amortised_cost
+        sukuk_bal = base.fvtoci_sukuk
+        ear_total = dep_bal + ac_bal + sukuk_bal
+        
+        dep_inc = base.investment_income_deposits
+        ac_inc = base.investment_income_amortised_cost
+        fvtoci_inc = base.investment_income_fvtoci
+        total_inc = base.investment_income
+        
+        # Annualised incomes
+        dep_inc_ann = dep_inc * ann_factor
+        ac_inc_ann = ac_inc * ann_factor
+        fvtoci_inc_ann = fvtoci_inc * ann_factor
+        total_inc_ann = total_inc * ann_factor
+        
+        # Implied yields
+        dep_yield = (dep_inc_ann / dep_bal * 100) if dep_bal > 0 else 0
+        ac_yield = (ac_inc_ann / ac_bal * 100) if ac_bal > 0 else 0
+        sukuk_yield = (fvtoci_inc_ann / sukuk_bal * 100) if sukuk_bal > 0 else 0
+        total_yield = (total_inc_ann / ear_total * 100) if ear_total > 0 else 0
+        
+        # -- Baseline table --
+        st.markdown("##### Current Baseline (Extracted from Financial Statement)")
+        
+        ear_df = pd.DataFrame({
+            'Asset Bucket': ['Investment Deposits', 'Amortised Cost (Sukuk)', 'FVTOCI Debt (Sukuk)', '**TOTAL**'],
+            'Balance': [fmt_smart(dep_bal), fmt_smart(ac_bal), fmt_smart(sukuk_bal), fmt_smart(ear_total)],
+            'Annual Income': [fmt_smart(dep_inc_ann), fmt_smart(ac_inc_ann), fmt_smart(fvtoci_inc_ann), fmt_smart(total_inc_ann)],
+            'Implied Yield': [f"{dep_yield:.2f}%", f"{ac_yield:.2f}%", f"{sukuk_yield:.2f}%", f"{total_yield:.2f}%"],
         })
+        st.dataframe(ear_df, hide_index=True, use_container_width=True)
         
-        st.dataframe(pd.DataFrame(driver_rows), hide_index=True, use_container_width=True)
+        # -- Assumption --
+        pct_sensitive = st.slider("% of deposits that are rate-sensitive", 50, 100, 100, 5, key="ear_pct")
+        sensitive_deposits = dep_bal * pct_sensitive / 100
         
-        # ── Section D — Scenario Summary ──────────────────────────────
-        st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-        st.markdown("#### Scenario Summary")
+        # -- Rate shock selector --
+        st.markdown("##### Rate Shock Scenario")
         
-        k1, k2, k3, k4 = st.columns(4)
-        delta_tv_pct = (delta_annual_total / baseline_tv * 100) if baseline_tv > 0 else 0
-        k1.metric(
-            "Annual Traded Value",
-            f"AED {scenario_annual_tv / 1_000_000:.1f}B",
-            f"{delta_annual_total / 1_000_000:+.1f}B ({delta_tv_pct:+.1f}%)" if abs(delta_annual_total) > 0.5 else "—",
-        )
-        k2.metric(
-            "ADTV",
-            f"AED {scenario_adtv / 1_000:.1f}M / day",
-            f"{(scenario_adtv - baseline_adtv) / 1_000:+.1f}M" if abs(scenario_adtv - baseline_adtv) > 0.5 else "—",
+        shock_bp = st.select_slider(
+            "Select rate change (basis points)",
+            options=[-200, -150, -100, -50, -25, 0, 25, 50, 100],
+            value=-100,
+            key="ear_shock",
         )
-        k3.metric(
-            "Commission Income",
-            fmt_smart(scenario_comm),
-            f"{delta_comm / 1_000:+.1f}M ({comm_pct:+.1f}%)" if abs(delta_comm) > 0.5 else "—",
-            delta_color="normal",
-        )
-        k4.metric(
-            "Commission Rate",
-            f"{baseline_rate:.1f} bps",
-            "unchanged",
+        
+        # Compute per-bucket impact
+        dep_delta = sensitive_deposits * shock_bp / 10000
+        ac_delta = ac_bal * shock_bp / 10000
+        sukuk_delta = sukuk_bal * shock_bp / 10000
+        total_delta = dep_delta + ac_delta + sukuk_delta
+        
+        # New incomes
+        dep_new = dep_inc_ann + dep_delta
+        ac_new = ac_inc_ann + ac_delta
+        fvtoci_new = fvtoci_inc_ann + sukuk_delta
+        total_new = total_inc_ann + total_delta
+        
+        # Pct changes
+        dep_pct = (dep_delta / dep_inc_ann * 100) if dep_inc_ann > 0 else 0
+        ac_pct = (ac_delta / ac_inc_ann * 100) if ac_inc_ann > 0 else 0
+        fvtoci_pct = (sukuk_delta / fvtoci_inc_ann * 100) if fvtoci_inc_ann > 0 else 0
+        total_pct = (total_delta / total_inc_ann * 100) if total_inc_ann > 0 else 0
+        
+        # Scenario table — matches baseline structure
+        scenario_df = pd.DataFrame({
+            'Asset Bucket': ['Investment Deposits', 'Amortised Cost (Sukuk)', 'FVTOCI Debt (Sukuk)', '**TOTAL**'],
+            'Current Income': [fmt_smart(dep_inc_ann), fmt_smart(ac_inc_ann), fmt_smart(fvtoci_inc_ann), fmt_smart(total_inc_ann)],
+            f'Impact ({shock_bp:+d} bps)': [fmt_smart(dep_delta), fmt_smart(ac_delta), fmt_smart(sukuk_delta), fmt_smart(total_delta)],
+            'New Income': [fmt_smart(dep_new), fmt_smart(ac_new), fmt_smart(fvtoci_new), fmt_smart(total_new)],
+            'Change': [f"{dep_pct:+.1f}%", f"{ac_pct:+.1f}%", f"{fvtoci_pct:+.1f}%", f"{total_pct:+.1f}%"],
+        })
+        st.dataframe(scenario_df, hide_index=True, use_container_width=True)
+        
+        # -- Summary metrics --
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Current Annual Income", fmt_smart(total_inc_ann))
+        m2.metric(f"Income Impact ({shock_bp:+d} bps)", fmt_smart(total_delta), f"{total_pct:+.1f}%", delta_color="normal")
+        m3.metric("New Annual Income", fmt_smart(total_new))
+        
+        # -- Chart: Baseline vs Scenario by bucket --
+        fig_ear = _memo_figure(
+            'ear_fig',
+            (shock_bp, dep_inc_ann, ac_inc_ann, fvtoci_inc_ann, total_inc_ann, dep_new, ac_new, fvtoci_new, total_new),
+            _ear_figure,
         )
+        st.plotly_chart(fig_ear, use_container_width=True)
         
-        # Summary table
-        sum_df = pd.DataFrame({
-            'Metric': ['Annual Traded Value', 'ADTV', 'Annual Commission Income'],
-            'Baseline': [
-                f"AED {baseline_tv / 1_000_000:.1f}B",
-                f"AED {baseline_adtv / 1_000:.1f}M / day",
-                fmt_smart(baseline_comm),
-            ],
-            'Scenario': [
-                f"AED {scenario_annual_tv / 1_000_000:.1f}B",
-                f"AED {scenario_adtv / 1_000:.1f}M / day",
-                fmt_smart(scenario_comm),
-            ],
-            'Change': [
-                f"{delta_annual_total / 1_000_000:+.1f}B ({delta_tv_pct:+.1f}%)" if abs(delta_annual_total) > 0.5 else "—",
-                f"{(scenario_adtv - baseline_adtv) / 1_000:+.1f}M / day" if abs(scenario_adtv - baseline_adtv) > 0.5 else "—",
-                f"{delta_comm / 1_000:+.1f}M ({comm_pct:+.1f}%)" if abs(delta_comm) > 0.5 else "—",
+        # -- Full sensitivity table (all shocks at once) --
+        with st.expander("📋  Full sensitivity table (all rate shocks)"):
+            st.dataframe(_ear_sensitivity_df(sensitive_deposits, ac_bal, sukuk_bal, total_inc_ann), hide_index=True, use_container_width=True)
+    
+    # ========== VALUE-AT-RISK (OCI / P&L) ==========
+    with risk_tab2:
+        st.markdown("#### Market Value Sensitivity: What happens to OCI/equity if markets move?")
+        st.markdown("*Only FVTOCI assets (AED 1.47B) are carried at fair value. Deposits and amortised cost assets (AED 4.58B) are not revalued — no OCI impact.*")
+        
+        # -- Extracted values display --
+        st.markdown("##### Baseline — FVTOCI Portfolio (Extracted from Financial Statement)")
+        
+        eq_bal = base.fvtoci_equity
+        fund_bal = base.fvtoci_funds
+        sukuk_bal_v = base.fvtoci_sukuk
+        fvtoci_total = base.fvtoci
+        equity_exposed = eq_bal + fund_bal
+        
+        var_df = pd.DataFrame({
+            'FVTOCI Category': ['Equity Securities', 'Managed Funds', 'Sukuk (Debt)', '**TOTAL FVTOCI**'],
+            'Balance': [fmt_smart(eq_bal), fmt_smart(fund_bal), fmt_smart(sukuk_bal_v), fmt_smart(fvtoci_total)],
+            'What Moves It': ['Equity market prices', 'Equity market prices', 'Interest rate changes', '—'],
+            'How It Hits OCI': [
+                'Price up/down → OCI gain/loss',
+                'Price up/down → OCI gain/loss',
+                'Rates up → sukuk price down → OCI loss',
+                '—',
             ],
         })
-        st.dataframe(sum_df, hide_index=True, use_container_width=True)
-        
-        # Bar chart: Baseline vs Scenario Annual TV
-        if abs(delta_annual_total) > 0.5:
-            fig_tv = go.Figure()
-            
-            labels = ['Baseline', 'Scenario']
-            values = [baseline_tv / 1_000_000, scenario_annual_tv / 1_000_000]
-            colors = ['#0066CC', '#28A745' if delta_annual_total >= 0 else '#DC3545']
-            texts = [f"AED {v:.1f}B" for v in values]
-            
-            fig_tv.add_trace(go.Bar(
-                x=labels, y=values,
-                marker_color=colors,
-                text=texts,
-                textposition='outside',
-                textfont=dict(size=13),
-            ))
-            
-            y_max = max(values) * 1.15
-            fig_tv.update_layout(
-                title="Annual Traded Value: Baseline vs Scenario",
-                height=380,
-                plot_bgcolor='white',
-                yaxis_title='AED Billions',
-                yaxis=dict(range=[0, y_max]),
-                showlegend=False,
+        st.dataframe(var_df, hide_index=True, use_container_width=True)
+        
+        # -- Assumptions --
+        st.markdown("##### Assumptions")
+        var_col1, var_col2 = st.columns(2)
+        with var_col1:
+            duration = st.number_input("FVTOCI sukuk modified duration (years)", 0.5, 10.0, 2.0, 0.5, key="var_dur")
+            st.caption("*Duration is not in the PDF — adjust to DFM's actual portfolio WAL*")
+        with var_col2:
+            st.markdown(f'''<div class="info-box">
+                    <strong>Modified duration</strong> measures how much a sukuk's price changes per 1% move in rates.<br>
+                    Duration of {duration:.1f} years means: if rates rise 1%, sukuk prices fall ~{duration:.1f}%.
+                </div>''', unsafe_allow_html=True)
+        
+        # -- Equity shock scenarios --
+        st.markdown("##### A) Equity Market Shock → OCI Impact")
+        st.markdown(f"*Applied to: FVTOCI equity ({fmt_smart(eq_bal)}) + managed funds ({fmt_smart(fund_bal)}) = {fmt_smart(equity_exposed)}*")
+        
+        eq_shocks = [-30, -20, -10, -5, 0, 5, 10, 20]
+        eq_scenarios = []
+        for pct in eq_shocks:
+            delta = equity_exposed * pct / 100
+            new_val = equity_exposed + delta
+            eq_scenarios.append({
+                'Equity Market Move': f"{pct:+d}%",
+                'Current Value': fmt_smart(equity_exposed),
+                'OCI Gain / (Loss)': f"{delta:+,.0f}",
+                'New FVTOCI Equity Value': fmt_smart(new_val),
+            })
+        
+        st.dataframe(pd.DataFrame(eq_scenarios), hide_index=True, use_container_width=True)
+        
+        # -- Rate shock on FVTOCI debt --
+        st.markdown("##### B) Interest Rate Shock → FVTOCI Sukuk OCI Impact")
+        st.markdown(f"*Applied to: FVTOCI sukuk ({fmt_smart(sukuk_bal_v)}) | Modified duration = {duration:.1f} years*")
+        
+        rate_shocks = [-200, -100, -50, 0, 50, 100, 200]
+        rate_scenarios = []
+        for bp in rate_shocks:
+            rate_chg_pct = bp / 100  # bps to percentage points
+            price_chg_pct = -duration * rate_chg_pct
+            oci_delta = sukuk_bal_v * price_chg_pct / 100
+            new_val = sukuk_bal_v + oci_delta
+            rate_scenarios.append({
+                'Rate Change': f"{bp:+d} bps",
+                'Sukuk Price Change': f"{price_chg_pct:+.1f}%",
+                'OCI Gain / (Loss)': f"{oci_delta:+,.0f}",
+                'New FVTOCI Sukuk Value': fmt_smart(new_val),
+            })
+        
+        st.dataframe(pd.DataFrame(rate_scenarios), hide_index=True, use_container_width=True)
+        
+        # -- Dynamic Combined Stress Scenario --
+        section_divider()
+        st.markdown("##### Combined Stress Scenario")
+        
+        stress_col1, stress_col2 = st.columns(2)
+        with stress_col1:
+            eq_shock_pct = st.select_slider(
+                "Equity market shock (%)",
+                options=[-30, -20, -10, -5, 0, 5, 10, 20],
+                value=-20,
+                key="stress_eq",
+            )
+        with stress_col2:
+            rate_shock_bp = st.select_slider(
+                "Interest rate shock (bps)",
+                options=[-200, -100, -50, 0, 50, 100, 200],
+                value=100,
+                key="stress_rate",
             )
-            st.plotly_chart(fig_tv, use_container_width=True)
+        
+        # Compute impacts
+        eq_stress = equity_exposed * eq_shock_pct / 100
+        rate_chg = rate_shock_bp / 100
+        price_chg = -duration * rate_chg
+        rate_stress = sukuk_bal_v * price_chg / 100
+        total_stress = eq_stress + rate_stress
+        
+        # Summary table
+        stress_df = pd.DataFrame({
+            'Component': ['FVTOCI Equity + Funds', 'FVTOCI Sukuk (Debt)', '**TOTAL OCI IMPACT**'],
+            'Balance': [fmt_smart(equity_exposed), fmt_smart(sukuk_bal_v), fmt_smart(fvtoci_total)],
+            'Shock Applied': [f"{eq_shock_pct:+d}% equity", f"{rate_shock_bp:+d} bps rates", "Combined"],
+            'OCI Gain / (Loss)': [fmt_smart(eq_stress), fmt_smart(rate_stress), fmt_smart(total_stress)],
+        })
+        st.dataframe(stress_df, hide_index=True, use_container_width=True)
+        
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Equity OCI Impact", fmt_smart(eq_stress), f"{eq_shock_pct:+d}% shock")
+        m2.metric("Sukuk OCI Impact", fmt_smart(rate_stress), f"{rate_shock_bp:+d} bps")
+        m3.metric("Total OCI Impact", fmt_smart(total_stress))
+        
+        # Chart with proper margins and label positioning
+        fig_var = _memo_figure('oci_fig', (eq_shock_pct, rate_shock_bp, eq_stress, rate_stress, total_stress), _oci_stress_figure)
+        st.plotly_chart(fig_var, use_container_width=True)
+
+def _derive_annuals(d, ann_factor, inv_trading_days):
+    """Fill in ADTV and the annualised commission and investment income (all in thousands)"""
+    d['adtv'] = d['total_traded_value'] * inv_trading_days
+    d['comm_annual'] = d['trading_commission'] * ann_factor
+    d['inv_annual'] = d['investment_income'] * ann_factor
+
+def main():
+    st.markdown('<p class="main-header">📊 DFM Scenario Analysis</p><p class="sub-header">Dubai Financial Market | Earnings Sensitivity Tool</p>', unsafe_allow_html=True)
+    
+    # ========== SIDEBAR ==========
+    with st.sidebar:
+        st.markdown("## 📁 Data Sources")
+        st.markdown("### Financial Statement")
+        fs_file = st.file_uploader("Upload PDF", type=['pdf'], key="fs")
+        st.markdown("### Market Bulletin")
+        bul_file = st.file_uploader("Upload Excel", type=['xlsx', 'xls'], key="bul")
+        st.markdown("---")
+        st.markdown("### ⚙️ Manual Input")
+        use_manual = st.checkbox("Enter values manually", value=False)
+    
+    # ========== PARSE FILES ==========
+    fs = _parse_once(fs_file, 'fs', parse_pdf) if fs_file else None
+    bul = _parse_once(bul_file, 'bul', parse_excel) if bul_file else None
+    
+    # ========== BUILD DATA ==========
+    # Layer this rerun's values over DEFAULT; every write below lands in the
+    # front dict, so DEFAULT itself is never copied or mutated
+    loaded = {key: fs[key] for key in FS_KEYS if fs.get(key)} if fs else {}
+    if bul and bul.get('total_traded_value'):
+        loaded['total_traded_value'] = bul['total_traded_value']
+    d = ChainMap(loaded, DEFAULT)
+    
+    # Portfolio and commission rate double as manual-override defaults
+    # (same definitions the parser uses, so the two can't drift)
+    d['portfolio'] = compute_portfolio_from_metrics(d)
+    d['ear_portfolio'] = compute_ear_portfolio(d)
+    
+    # Period/day scaling factors (manual overrides never touch these inputs)
+    ann_factor = 12 / d['period_months'] if d['period_months'] > 0 else 1
+    inv_trading_days = 1 / d['trading_days'] if d['trading_days'] > 0 else 0
+    
+    # Commission rate (bps)
+    base_comm_annual = d['trading_commission'] * ann_factor
+    if d['total_traded_value'] > 0 and base_comm_annual > 0:
+        d['comm_rate'] = base_comm_annual / d['total_traded_value'] * 10000
+    else:
+        d['comm_rate'] = 25.0
+    
+    # ========== MANUAL OVERRIDE ==========
+    if use_manual:
+        overrides = {}
+        # Form batches edits into a single rerun on submit
+        with st.sidebar.form("manual_overrides", clear_on_submit=False):
+            st.markdown("#### Enter Values (AED '000)")
+            overrides['trading_commission'] = st.number_input("Trading Commission", value=float(d['trading_commission']), min_value=0.0, format="%.0f")
+            overrides['investment_income'] = st.number_input("Investment Income", value=float(d['investment_income']), min_value=0.0, format="%.0f")
+            overrides['portfolio'] = st.number_input("Portfolio", value=float(d['portfolio']), min_value=0.0, format="%.0f")
+            overrides['total_traded_value'] = st.number_input("Total Traded Value", value=float(d['total_traded_value']), min_value=0.0, format="%.0f")
+            overrides['comm_rate'] = st.number_input("Commission Rate (bps)", value=float(d['comm_rate']), min_value=0.1, max_value=100.0, format="%.1f")
+            st.form_submit_button("Apply overrides")
+        d.update(overrides)
+    
+    # Derive once, after any overrides
+    _derive_annuals(d, ann_factor, inv_trading_days)
+    base = Baseline(**d)
+    
+    # ========== STATUS ==========
+    if fs:
+        fs_status = _status_html(True, "Financial Statement", fs.get("items", []), fs.get("warnings", []))
+    else:
+        fs_status = _status_html(False, "No FS uploaded", ["Using Q3 2025 defaults"])
+    if bul:
+        bul_status = _status_html(True, "Bulletin", bul.get("items", []))
+    else:
+        bul_status = _status_html(False, "No Bulletin uploaded", ["Using 2025 defaults"])
+    st.markdown(f'{SECTION_DIVIDER}<div class="status-grid">{fs_status}{bul_status}</div>', unsafe_allow_html=True)
+    
+    # ========== METRICS ==========
+    section_divider()
+    st.markdown("### 📋 Baseline Metrics")
+    cards = [
+        _metric_card_html(f'Trading Commission ({base.period_months}M)', fmt_smart(base.trading_commission), f'Annual: {fmt_smart(base.comm_annual)}'),
+        _metric_card_html("Avg Daily Traded Value", fmt_smart(base.adtv), f'Total: {fmt_smart(base.total_traded_value)}'),
+        _metric_card_html("Investment Portfolio", fmt_smart(base.portfolio), "Deposits + AC + FVTOCI"),
+        _metric_card_html(f'Investment Income ({base.period_months}M)', fmt_smart(base.investment_income), f'Annual: {fmt_smart(base.inv_annual)}'),
+        _metric_card_html(f'Dividend Income ({base.period_months}M)', fmt_smart(base.dividend_income), "FVTOCI equity dividends"),
+    ]
+    st.markdown(f'<div class="metric-grid">{"".join(cards)}</div>{SECTION_DIVIDER}', unsafe_allow_html=True)
+    
+    # ========== SCENARIO TABS ==========
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📉 Commission Fee", "📊 Traded Value", "💰 Interest Rate", "🔄 Combined", "🏦 Investment Risk"])
+    
+    # ---------- TAB 1: Commission Fee ----------
+    with tab1:
+        _commission_tab(base, inv_trading_days)
+    
+    # ---------- TAB 2: Traded Value ----------
+    with tab2:
+        _traded_value_tab(base, bul)
     
     # ---------- TAB 3: Interest Rate ----------
     with tab3:
-        st.markdown("### Interest Rate Scenario")
-        st.markdown("*What if interest rates change? Uses Earnings-at-Risk portfolio (deposits + amortised cost + FVTOCI sukuk)*")
-        
-        col_in, col_out = st.columns([1, 2])
-        
-        with col_in:
-            st.markdown("#### Scenario Inputs")
-            
-            port_b = d['ear_portfolio'] / 1_000_000
-            portfolio = st.number_input("EaR Portfolio (AED B)", 0.5, 20.0, clamp(port_b, 0.5, 20.0, 4.9), 0.1, key="t3_port") * 1_000_000
-            
-            cur_rate = st.number_input("Current Rate (%)", 0.0, 15.0, 5.0, 0.25, key="t3_cur_rate")
-            
-            rate_chg = st.selectbox("Rate Change", ["+50 bps", "+25 bps", "No change", "-25 bps", "-50 bps", "-100 bps", "-150 bps"], index=4, key="t3_chg")
-            chg_map = {"+50 bps": 0.5, "+25 bps": 0.25, "No change": 0, "-25 bps": -0.25, "-50 bps": -0.5, "-100 bps": -1.0, "-150 bps": -1.5}
-            new_rate = max(0, cur_rate + chg_map[rate_chg])
-            
-            st.info(f"New Rate: **{new_rate:.2f}%**")
-        
-        with col_out:
-            st.markdown("#### Impact Analysis")
-            
-            cur_inc = calc_inv(portfolio, cur_rate)
-            new_inc = calc_inv(portfolio, new_rate)
-            diff = new_inc - cur_inc
-            pct_str = f"{(diff / cur_inc * 100):+.1f}%" if cur_inc > 0 else "—"
-            
-            m1, m2, m3 = st.columns(3)
-            m1.metric("Current Income", fmt_smart(cur_inc), f"@ {cur_rate:.2f}%")
-            m2.metric("Scenario Income", fmt_smart(new_inc), f"@ {new_rate:.2f}%")
-            m3.metric("Annual Impact", fmt_smart(diff), pct_str, delta_color="normal")
-            
-            st.markdown(f'<div class="info-box"><strong>Calculation:</strong><br>{fmt_smart(portfolio)} × {chg_map[rate_chg]*100:+.0f} bps = <strong>{fmt_smart(diff)}</strong> annual impact</div>', unsafe_allow_html=True)
-            
-            # Sensitivity table
-            sens_data = []
-            for bp in [100, 50, 25, 0, -25, -50, -100, -150, -200]:
-                r = max(0, cur_rate + bp/100)
-                inc = calc_inv(portfolio, r)
-                sens_data.append({'Rate Δ': f"{bp:+d} bps", 'New Rate': f"{r:.2f}%", 'Income': fmt_smart(inc), 'Impact': fmt_smart(inc - cur_inc)})
-            st.dataframe(pd.DataFrame(sens_data), hide_index=True, use_container_width=True)
+        _interest_rate_tab(base)
     
     # ---------- TAB 4: Combined ----------
     with tab4:
-        st.markdown("### Combined Scenario")
-        st.markdown("*Model multiple changes together*")
-        
-        col_in, col_out = st.columns([1, 1])
-        
-        with col_in:
-            st.markdown("#### Scenario Inputs")
-            
-            tv_b = d['total_traded_value'] / 1_000_000
-            comb_tv = st.number_input("Traded Value (AED B)", 1.0, 1000.0, clamp(tv_b, 1.0, 1000.0, 165.0), 5.0, key="t4_tv") * 1_000_000
-            comb_rate = st.number_input("Comm Rate (bps)", 1.0, 100.0, clamp(d['comm_rate'], 1.0, 100.0, 25.0), 0.5, key="t4_rate")
-            
-            port_b = d['ear_portfolio'] / 1_000_000
-            comb_port = st.number_input("EaR Portfolio (AED B)", 0.5, 20.0, clamp(port_b, 0.5, 20.0, 4.9), 0.1, key="t4_port") * 1_000_000
-            comb_ir = st.number_input("Interest Rate (%)", 0.0, 15.0, 5.0, 0.25, key="t4_ir")
-        
-        with col_out:
-            st.markdown("#### Results")
-            
-            # Scenario values
-            sc_comm = calc_comm(comb_tv, comb_rate)
-            sc_inv = calc_inv(comb_port, comb_ir)
-            sc_total = sc_comm + sc_inv
-            
-            # Baseline
-            bl_comm = d['comm_annual']
-            bl_inv = d['inv_annual']
-            bl_total = bl_comm + bl_inv
-            
-            st.dataframe(pd.DataFrame({
-                'Revenue': ['Trading Commission', 'Investment Income', 'TOTAL'],
-                'Baseline': [fmt_smart(bl_comm), fmt_smart(bl_inv), fmt_smart(bl_total)],
-                'Scenario': [fmt_smart(sc_comm), fmt_smart(sc_inv), fmt_smart(sc_total)],
-                'Change': [fmt_smart(sc_comm - bl_comm), fmt_smart(sc_inv - bl_inv), fmt_smart(sc_total - bl_total)]
-            }), hide_index=True, use_container_width=True)
-            
-            m1, m2, m3 = st.columns(3)
-            m1.metric("Commission", fmt_smart(sc_comm), fmt_smart(sc_comm - bl_comm))
-            m2.metric("Investment", fmt_smart(sc_inv), fmt_smart(sc_inv - bl_inv))
-            tot_pct = ((sc_total - bl_total) / bl_total * 100) if bl_total > 0 else 0
-            m3.metric("Total Δ", fmt_smart(sc_total - bl_total), f"{tot_pct:+.1f}%")
-            
-            # Waterfall
-            fig = go.Figure(go.Waterfall(
-                orientation="v",
-                measure=["absolute", "relative", "relative", "total"],
-                x=["Baseline", "Commission Δ", "Investment Δ", "Scenario"],
-                y=[bl_total/1000, (sc_comm-bl_comm)/1000, (sc_inv-bl_inv)/1000, sc_total/1000],
-                text=[fmt_smart(bl_total), fmt_smart(sc_comm-bl_comm), fmt_smart(sc_inv-bl_inv), fmt_smart(sc_total)],
-                textposition="outside",
-                connector={"line": {"color": "#0066CC"}},
-                decreasing={"marker": {"color": "#DC3545"}},
-                increasing={"marker": {"color": "#28A745"}},
-                totals={"marker": {"color": "#0066CC"}}
-            ))
-            fig.update_layout(title="Revenue Bridge", height=350, plot_bgcolor='white', yaxis_title="AED Millions", showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+        _combined_tab(base)
     
     # ---------- TAB 5: Investment Portfolio Risk ----------
     with tab5:
-        st.markdown("### Investment Portfolio Risk Analysis")
-        st.markdown("*Two complementary risk lenses for DFM's investment portfolio*")
-        
-        risk_tab1, risk_tab2 = st.tabs(["📈 Earnings Sensitivity (Income)", "📉 Market Value Sensitivity (OCI/P&L)"])
-        
-        # ========== EARNINGS-AT-RISK (P&L) ==========
-        with risk_tab1:
-            st.markdown("#### Earnings-at-Risk: If interest rates change, what happens to DFM's investment income?")
-            st.markdown("*Only assets generating recurring investment income: deposits, amortised cost (sukuk), FVTOCI debt (sukuk)*")
-            
-            # -- Extract values --
-            dep_bal = d.get('investment_deposits', 0)
-            ac_bal = d.get('investments_amortised_cost', 0)
-            sukuk_bal = d.get('fvtoci_sukuk', 0)
-            ear_total = dep_bal + ac_bal + sukuk_bal
-            
-            dep_inc = d.get('investment_income_deposits', 0)
-            ac_inc = d.get('investment_income_amortised_cost', 0)
-            fvtoci_inc = d.get('investment_income_fvtoci', 0)
-            total_inc = d.get('investment_income', 0)
-            
-            pm = d.get('period_months', 12)
-            ann_factor = 12 / pm if pm > 0 else 1
-            
-            # Annualised incomes
-            dep_inc_ann = dep_inc * ann_factor
-            ac_inc_ann = ac_inc * ann_factor
-            fvtoci_inc_ann = fvtoci_inc * ann_factor
-            total_inc_ann = total_inc * ann_factor
-            
-            # Implied yields
-            dep_yield = (dep_inc_ann / dep_bal * 100) if dep_bal > 0 else 0
-            ac_yield = (ac_inc_ann / ac_bal * 100) if ac_bal > 0 else 0
-            sukuk_yield = (fvtoci_inc_ann / sukuk_bal * 100) if sukuk_bal > 0 else 0
-            total_yield = (total_inc_ann / ear_total * 100) if ear_total > 0 else 0
-            
-            # -- Baseline table --
-            st.markdown("##### Current Baseline (Extracted from Financial Statement)")
-            
-            ear_df = pd.DataFrame({
-                'Asset Bucket': ['Investment Deposits', 'Amortised Cost (Sukuk)', 'FVTOCI Debt (Sukuk)', '**TOTAL**'],
-                'Balance': [fmt_smart(dep_bal), fmt_smart(ac_bal), fmt_smart(sukuk_bal), fmt_smart(ear_total)],
-                'Annual Income': [fmt_smart(dep_inc_ann), fmt_smart(ac_inc_ann), fmt_smart(fvtoci_inc_ann), fmt_smart(total_inc_ann)],
-                'Implied Yield': [f"{dep_yield:.2f}%", f"{ac_yield:.2f}%", f"{sukuk_yield:.2f}%", f"{total_yield:.2f}%"],
-            })
-            st.dataframe(ear_df, hide_index=True, use_container_width=True)
-            
-            # -- Assumption --
-            pct_sensitive = st.slider("% of deposits that are rate-sensitive", 50, 100, 100, 5, key="ear_pct")
-            sensitive_deposits = dep_bal * pct_sensitive / 100
-            
-            # -- Rate shock selector --
-            st.markdown("##### Rate Shock Scenario")
-            
-            shock_bp = st.select_slider(
-                "Select rate change (basis points)",
-                options=[-200, -150, -100, -50, -25, 0, 25, 50, 100],
-                value=-100,
-                key="ear_shock",
-            )
-            
-            # Compute per-bucket impact
-            dep_delta = sensitive_deposits * shock_bp / 10000
-            ac_delta = ac_bal * shock_bp / 10000
-            sukuk_delta = sukuk_bal * shock_bp / 10000
-            total_delta = dep_delta + ac_delta + sukuk_delta
-            
-            # New incomes
-            dep_new = dep_inc_ann + dep_delta
-            ac_new = ac_inc_ann + ac_delta
-            fvtoci_new = fvtoci_inc_ann + sukuk_delta
-            total_new = total_inc_ann + total_delta
-            
-            # Pct changes
-            dep_pct = (dep_delta / dep_inc_ann * 100) if dep_inc_ann > 0 else 0
-            ac_pct = (ac_delta / ac_inc_ann * 100) if ac_inc_ann > 0 else 0
-            fvtoci_pct = (sukuk_delta / fvtoci_inc_ann * 100) if fvtoci_inc_ann > 0 else 0
-            total_pct = (total_delta / total_inc_ann * 100) if total_inc_ann > 0 else 0
-            
-            # Scenario table — matches baseline structure
-            scenario_df = pd.DataFrame({
-                'Asset Bucket': ['Investment Deposits', 'Amortised Cost (Sukuk)', 'FVTOCI Debt (Sukuk)', '**TOTAL**'],
-                'Current Income': [fmt_smart(dep_inc_ann), fmt_smart(ac_inc_ann), fmt_smart(fvtoci_inc_ann), fmt_smart(total_inc_ann)],
-                f'Impact ({shock_bp:+d} bps)': [fmt_smart(dep_delta), fmt_smart(ac_delta), fmt_smart(sukuk_delta), fmt_smart(total_delta)],
-                'New Income': [fmt_smart(dep_new), fmt_smart(ac_new), fmt_smart(fvtoci_new), fmt_smart(total_new)],
-                'Change': [f"{dep_pct:+.1f}%", f"{ac_pct:+.1f}%", f"{fvtoci_pct:+.1f}%", f"{total_pct:+.1f}%"],
-            })
-            st.dataframe(scenario_df, hide_index=True, use_container_width=True)
-            
-            # -- Summary metrics --
-            m1, m2, m3 = st.columns(3)
-            m1.metric("Current Annual Income", fmt_smart(total_inc_ann))
-            m2.metric(f"Income Impact ({shock_bp:+d} bps)", fmt_smart(total_delta), f"{total_pct:+.1f}%", delta_color="normal")
-            m3.metric("New Annual Income", fmt_smart(total_new))
-            
-            # -- Chart: Baseline vs Scenario by bucket --
-            fig_ear = go.Figure()
-            buckets = ['Deposits', 'Amortised Cost', 'FVTOCI Sukuk', 'Total']
-            baseline_vals = [dep_inc_ann / 1000, ac_inc_ann / 1000, fvtoci_inc_ann / 1000, total_inc_ann / 1000]
-            scenario_vals = [dep_new / 1000, ac_new / 1000, fvtoci_new / 1000, total_new / 1000]
-            
-            fig_ear.add_trace(go.Bar(
-                name='Current Income',
-                x=buckets, y=baseline_vals,
-                marker_color='#0066CC',
-                text=[fmt_smart(dep_inc_ann), fmt_smart(ac_inc_ann), fmt_smart(fvtoci_inc_ann), fmt_smart(total_inc_ann)],
-                textposition='outside',
-            ))
-            fig_ear.add_trace(go.Bar(
-                name=f'After {shock_bp:+d} bps',
-                x=buckets, y=scenario_vals,
-                marker_color='#DC3545' if shock_bp < 0 else '#28A745',
-                text=[fmt_smart(dep_new), fmt_smart(ac_new), fmt_smart(fvtoci_new), fmt_smart(total_new)],
-                textposition='outside',
-            ))
-            fig_ear.update_layout(
-                title=f"Investment Income: Current vs {shock_bp:+d} bps Scenario",
-                barmode='group',
-                height=400,
-                plot_bgcolor='white',
-                yaxis_title='AED Millions',
-            )
-            st.plotly_chart(fig_ear, use_container_width=True)
-            
-            # -- Full sensitivity table (all shocks at once) --
-            with st.expander("📋  Full sensitivity table (all rate shocks)"):
-                all_shocks = [-200, -150, -100, -50, -25, 0, 25, 50, 100]
-                full_sens = []
-                for bp in all_shocks:
-                    d_dep = sensitive_deposits * bp / 10000
-                    d_ac = ac_bal * bp / 10000
-                    d_sk = sukuk_bal * bp / 10000
-                    d_tot = d_dep + d_ac + d_sk
-                    full_sens.append({
-                        'Rate Shock': f"{bp:+d} bps",
-                        'Deposits Impact': fmt_smart(d_dep),
-                        'AC Impact': fmt_smart(d_ac),
-                        'Sukuk Impact': fmt_smart(d_sk),
-                        'Total Impact': fmt_smart(d_tot),
-                        'New Total Income': fmt_smart(total_inc_ann + d_tot),
-                        'Change': f"{(d_tot / total_inc_ann * 100):+.1f}%" if total_inc_ann > 0 else "—",
-                    })
-                st.dataframe(pd.DataFrame(full_sens), hide_index=True, use_container_width=True)
-        
-        # ========== VALUE-AT-RISK (OCI / P&L) ==========
-        with risk_tab2:
-            st.markdown("#### Market Value Sensitivity: What happens to OCI/equity if markets move?")
-            st.markdown("*Only FVTOCI assets (AED 1.47B) are carried at fair value. Deposits and amortised cost assets (AED 4.58B) are not revalued — no OCI impact.*")
-            
-            # -- Extracted values display --
-            st.markdown("##### Baseline — FVTOCI Portfolio (Extracted from Financial Statement)")
-            
-            eq_bal = d.get('fvtoci_equity', 0)
-            fund_bal = d.get('fvtoci_funds', 0)
-            sukuk_bal_v = d.get('fvtoci_sukuk', 0)
-            fvtoci_total = d.get('fvtoci', 0)
-            equity_exposed = eq_bal + fund_bal
-            
-            var_df = pd.DataFrame({
-                'FVTOCI Category': ['Equity Securities', 'Managed Funds', 'Sukuk (Debt)', '**TOTAL FVTOCI**'],
-                'Balance': [fmt_smart(eq_bal), fmt_smart(fund_bal), fmt_smart(sukuk_bal_v), fmt_smart(fvtoci_total)],
-                'What Moves It': ['Equity market prices', 'Equity market prices', 'Interest rate changes', '—'],
-                'How It Hits OCI': [
-                    'Price up/down → OCI gain/loss',
-                    'Price up/down → OCI gain/loss',
-                    'Rates up → sukuk price down → OCI loss',
-                    '—',
-                ],
-            })
-            st.dataframe(var_df, hide_index=True, use_container_width=True)
-            
-            # -- Assumptions --
-            st.markdown("##### Assumptions")
-            var_col1, var_col2 = st.columns(2)
-            with var_col1:
-                duration = st.number_input("FVTOCI sukuk modified duration (years)", 0.5, 10.0, 2.0, 0.5, key="var_dur")
-                st.caption("*Duration is not in the PDF — adjust to DFM's actual portfolio WAL*")
-            with var_col2:
-                st.markdown(f'''<div class="info-box">
-                    <strong>Modified duration</strong> measures how much a sukuk's price changes per 1% move in rates.<br>
-                    Duration of {duration:.1f} years means: if rates rise 1%, sukuk prices fall ~{duration:.1f}%.
-                </div>''', unsafe_allow_html=True)
-            
-            # -- Equity shock scenarios --
-            st.markdown("##### A) Equity Market Shock → OCI Impact")
-            st.markdown(f"*Applied to: FVTOCI equity ({fmt_smart(eq_bal)}) + managed funds ({fmt_smart(fund_bal)}) = {fmt_smart(equity_exposed)}*")
-            
-            eq_shocks = [-30, -20, -10, -5, 0, 5, 10, 20]
-            eq_scenarios = []
-            for pct in eq_shocks:
-                delta = equity_exposed * pct / 100
-                new_val = equity_exposed + delta
-                eq_scenarios.append({
-                    'Equity Market Move': f"{pct:+d}%",
-                    'Current Value': fmt_smart(equity_exposed),
-                    'OCI Gain / (Loss)': f"{delta:+,.0f}",
-                    'New FVTOCI Equity Value': fmt_smart(new_val),
-                })
-            
-            st.dataframe(pd.DataFrame(eq_scenarios), hide_index=True, use_container_width=True)
-            
-            # -- Rate shock on FVTOCI debt --
-            st.markdown("##### B) Interest Rate Shock → FVTOCI Sukuk OCI Impact")
-            st.markdown(f"*Applied to: FVTOCI sukuk ({fmt_smart(sukuk_bal_v)}) | Modified duration = {duration:.1f} years*")
-            
-            rate_shocks = [-200, -100, -50, 0, 50, 100, 200]
-            rate_scenarios = []
-            for bp in rate_shocks:
-                rate_chg_pct = bp / 100  # bps to percentage points
-                price_chg_pct = -duration * rate_chg_pct
-                oci_delta = sukuk_bal_v * price_chg_pct / 100
-                new_val = sukuk_bal_v + oci_delta
-                rate_scenarios.append({
-                    'Rate Change': f"{bp:+d} bps",
-                    'Sukuk Price Change': f"{price_chg_pct:+.1f}%",
-                    'OCI Gain / (Loss)': f"{oci_delta:+,.0f}",
-                    'New FVTOCI Sukuk Value': fmt_smart(new_val),
-                })
-            
-            st.dataframe(pd.DataFrame(rate_scenarios), hide_index=True, use_container_width=True)
-            
-            # -- Dynamic Combined Stress Scenario --
-            st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
-            st.markdown("##### Combined Stress Scenario")
-            
-            stress_col1, stress_col2 = st.columns(2)
-            with stress_col1:
-                eq_shock_pct = st.select_slider(
-                    "Equity market shock (%)",
-                    options=[-30, -20, -10, -5, 0, 5, 10, 20],
-                    value=-20,
-                    key="stress_eq",
-                )
-            with stress_col2:
-                rate_shock_bp = st.select_slider(
-                    "Interest rate shock (bps)",
-                    options=[-200, -100, -50, 0, 50, 100, 200],
-                    value=100,
-                    key="stress_rate",
-                )
-            
-            # Compute impacts
-            eq_stress = equity_exposed * eq_shock_pct / 100
-            rate_chg = rate_shock_bp / 100
-            price_chg = -duration * rate_chg
-            rate_stress = sukuk_bal_v * price_chg / 100
-            total_stress = eq_stress + rate_stress
-            
-            # Summary table
-            stress_df = pd.DataFrame({
-                'Component': ['FVTOCI Equity + Funds', 'FVTOCI Sukuk (Debt)', '**TOTAL OCI IMPACT**'],
-                'Balance': [fmt_smart(equity_exposed), fmt_smart(sukuk_bal_v), fmt_smart(fvtoci_total)],
-                'Shock Applied': [f"{eq_shock_pct:+d}% equity", f"{rate_shock_bp:+d} bps rates", "Combined"],
-                'OCI Gain / (Loss)': [fmt_smart(eq_stress), fmt_smart(rate_stress), fmt_smart(total_stress)],
-            })
-            st.dataframe(stress_df, hide_index=True, use_container_width=True)
-            
-            m1, m2, m3 = st.columns(3)
-            m1.metric("Equity OCI Impact", fmt_smart(eq_stress), f"{eq_shock_pct:+d}% shock")
-            m2.metric("Sukuk OCI Impact", fmt_smart(rate_stress), f"{rate_shock_bp:+d} bps")
-            m3.metric("Total OCI Impact", fmt_smart(total_stress))
-            
-            # Chart with proper margins and label positioning
-            fig_var = go.Figure()
-            
-            bar_labels = [
-                f'FVTOCI Equity<br>({eq_shock_pct:+d}% shock)',
-                f'FVTOCI Sukuk<br>({rate_shock_bp:+d} bps)',
-                'Total OCI Impact',
-            ]
-            bar_values = [eq_stress / 1000, rate_stress / 1000, total_stress / 1000]
-            bar_text = [fmt_smart(eq_stress), fmt_smart(rate_stress), fmt_smart(total_stress)]
-            bar_colors = ['#DC3545', '#FF9800', '#0066CC']
-            
-            fig_var.add_trace(go.Bar(
-                x=bar_labels,
-                y=bar_values,
-                marker_color=bar_colors,
-                text=bar_text,
-                textposition='outside',
-                textfont=dict(size=13),
-            ))
-            
-            # Calculate y-axis range to ensure labels aren't cut off
-            min_val = min(bar_values)
-            max_val = max(bar_values)
-            y_pad = max(abs(min_val), abs(max_val)) * 0.25
-            
-            fig_var.update_layout(
-                title=f"OCI Stress Test: Equity {eq_shock_pct:+d}% + Rates {rate_shock_bp:+d} bps",
-                height=420,
-                plot_bgcolor='white',
-                yaxis_title='AED Millions',
-                yaxis=dict(range=[min_val - y_pad, max_val + y_pad]),
-                showlegend=False,
-                margin=dict(b=80),
-            )
-            st.plotly_chart(fig_var, use_container_width=True)
+        _investment_risk_tab(base, ann_factor)
     
     # Footer
-    st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
+    section_divider()
     st.caption("**Data:** Upload files for latest data, or uses Q3 2025 defaults | **Version:** v4.0 (FS1) | **Disclaimer:** For internal analysis only")
 
 if __name__ == "__main__":
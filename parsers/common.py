@@ -1,8 +1,21 @@
 import re
+from importlib.util import find_spec
 from typing import Iterable, Optional
 
+# Rust-backed workbook reader when python-calamine is installed; None leaves
+# pandas on its default (openpyxl) engine
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") is not None else None
+
 EMPTY_TOKENS = {"", "-", "–", "—", "na", "n/a"}
 
+_DASHES_ONLY_RE = re.compile(r"[()\-–—\s]*")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_NOTE_REF_RE = re.compile(r"\bnote\s*\d+[a-z]*(?:\([a-z]\))?")
+_BARE_NOTE_REF_RE = re.compile(r"\b\d+\s*\([a-z]\)")
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_WS_RE = re.compile(r"\s+")
+
 
 def parse_number(value) -> Optional[float]:
     if value is None:
@@ -16,14 +29,14 @@ def parse_number(value) -> Optional[float]:
     if lower in EMPTY_TOKENS:
         return None
     text = text.replace(",", "").replace(" ", "")
-    if re.fullmatch(r"[()\-–—\s]*", text):
+    if _DASHES_ONLY_RE.fullmatch(text):
         return None
     neg = False
     if text.startswith("(") and text.endswith(")"):
         neg = True
         text = text[1:-1]
     text = text.replace("–", "-").replace("—", "-")
-    match = re.search(r"-?\d+(?:\.\d+)?", text)
+    match = _NUMBER_RE.search(text)
     if not match:
         return None
     number = float(match.group(0))
@@ -34,11 +47,11 @@ def parse_number(value) -> Optional[float]:
 
 def normalize_label(label: str) -> str:
     text = str(label or "").lower()
-    text = re.sub(r"\bnote\s*\d+[a-z]*(?:\([a-z]\))?", "", text)
-    text = re.sub(r"\b\d+\s*\([a-z]\)", "", text)
-    text = re.sub(r"\([^)]*\)", " ", text)
-    text = re.sub(r"[^a-z0-9]+", " ", text)
-    return re.sub(r"\s+", " ", text).strip()
+    text = _NOTE_REF_RE.sub("", text)
+    text = _BARE_NOTE_REF_RE.sub("", text)
+    text = _PAREN_RE.sub(" ", text)
+    text = _NON_ALNUM_RE.sub(" ", text)
+    return _WS_RE.sub(" ", text).strip()
 
 
 def label_matches(label: str, options: Iterable[str]) -> bool:
@@ -16,14 +16,24 @@ Key design principles:
 
 from __future__ import annotations
 
+import io
+import os
 import re
+from contextlib import ExitStack, closing
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Optional, Tuple
-
-import pdfplumber
+from functools import partial
+from importlib.util import find_spec
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
 
 from .common import compute_portfolio, parse_number
 
+# pdfplumber, PyMuPDF and pypdfium2 are imported on first parse, so importing
+# the package (and starting the app) doesn't pay for any PDF stack.
+# PyMuPDF is optional: faster text and tables. Without it, pypdfium2 (also
+# optional) supplies the text and pdfplumber only the tables.
+_HAS_PYMUPDF = find_spec("pymupdf") is not None
+_HAS_PYPDFIUM2 = find_spec("pypdfium2") is not None
+
 # ───────────────────────────────────────────────────────────
 # 1) LABEL DICTIONARIES — keyed by metric name
 # ───────────────────────────────────────────────────────────
@@ -103,6 +113,8 @@ def _classify_page(text: str) -> Optional[str]:
 
 _YEAR_RE = re.compile(r"\b(20\d{2})\b")
 _NUM_RE = re.compile(r"-?\(?\d[\d,]*\)?")
+_HEADER_YEAR_RE = re.compile(r"20(\d{2})")
+_WS_RE = re.compile(r"\s+")
 
 
 def _detect_column_count(page_text: str) -> int:
@@ -212,17 +224,35 @@ class Candidate:
 
 def _normalise(text: str) -> str:
     """Lowercase, collapse whitespace."""
-    return re.sub(r"\s+", " ", text.lower().strip())
+    return _WS_RE.sub(" ", text.lower().strip())
 
 
-def _label_matches(text: str, keywords: List[str]) -> Optional[str]:
-    """Check if text starts with any keyword. Returns matched keyword or None."""
-    norm = _normalise(text)
-    for kw in keywords:
-        kw_norm = _normalise(kw)
-        if norm.startswith(kw_norm):
-            return kw_norm
-    return None
+def _label_alternation(label_sets: Dict[str, List[str]]) -> Pattern[str]:
+    """One alternation over every keyword, a named group per metric.
+
+    Keywords keep their list order inside each group, so ``.match`` returns
+    the same keyword a per-keyword ``startswith`` loop would.
+    """
+    groups = []
+    for metric, keywords in label_sets.items():
+        alts = "|".join(re.escape(_normalise(kw)) for kw in keywords)
+        groups.append(f"(?P<{metric}>{alts})")
+    return re.compile("|".join(groups))
+
+
+_SECTION_LABELS: Dict[str, Tuple[Dict[str, List[str]], Pattern[str]]] = {
+    "pl": (INCOME_LABELS, _label_alternation(INCOME_LABELS)),
+    "bs": (BALANCE_LABELS, _label_alternation(BALANCE_LABELS)),
+}
+
+# Whitespace-tolerant form of each normalised keyword, for locating the
+# label end in a raw line whose spacing differs from the keyword's
+_FLEX_KEYWORD_RES: Dict[str, Pattern[str]] = {
+    kw: re.compile(r"\s+".join(re.escape(w) for w in kw.split()), re.IGNORECASE)
+    for labels in (INCOME_LABELS, BALANCE_LABELS)
+    for keywords in labels.values()
+    for kw in map(_normalise, keywords)
+}
 
 
 def _extract_regex_candidates(
@@ -235,53 +265,55 @@ def _extract_regex_candidates(
     candidates: List[Candidate] = []
 
     # Choose label sets by section
-    if section == "pl":
-        label_sets = INCOME_LABELS
-    elif section == "bs":
-        label_sets = BALANCE_LABELS
-    else:
+    if section not in _SECTION_LABELS:
         return candidates   # skip OCI, cashflow, notes for regex
+    label_sets, label_re = _SECTION_LABELS[section]
 
-    for metric, keywords in label_sets.items():
-        for line in lines:
-            matched_kw = _label_matches(line, keywords)
-            if matched_kw is None:
-                continue
-
-            # Find where the keyword ends in the original line
-            # Use case-insensitive search on the original line directly
-            kw_pos = line.lower().find(matched_kw)
-            if kw_pos >= 0:
-                actual_end = kw_pos + len(matched_kw)
+    # Match each line once, but keep candidates grouped by metric in label order
+    by_metric: Dict[str, List[Candidate]] = {metric: [] for metric in label_sets}
+    for line in lines:
+        match = label_re.match(_normalise(line))
+        if match is None:
+            continue
+        metric = match.lastgroup
+        matched_kw = match.group()
+
+        # Find where the keyword ends in the original line
+        # Use case-insensitive search on the original line directly
+        kw_pos = line.lower().find(matched_kw)
+        if kw_pos >= 0:
+            actual_end = kw_pos + len(matched_kw)
+        else:
+            # Fallback: whitespace-tolerant search for the keyword
+            m = _FLEX_KEYWORD_RES[matched_kw].search(line)
+            if m:
+                actual_end = m.end()
             else:
-                # Fallback: build a flexible regex from the keyword
-                kw_pattern = r"\s+".join(re.escape(w) for w in matched_kw.split())
-                m = re.search(kw_pattern, line, re.IGNORECASE)
-                if m:
-                    actual_end = m.end()
-                else:
-                    continue
-
-            values = _extract_line_numbers(line, actual_end)
-            value = _pick_current_year_value(values, col_count, section)
-            if value is None:
                 continue
 
-            # Score: base 1, +2 for correct primary statement
-            score = 1
-            if metric in INCOME_LABELS and section == "pl":
-                score += 2
-            elif metric in BALANCE_LABELS and section == "bs":
-                score += 2
-
-            candidates.append(Candidate(
-                metric=metric,
-                value=value,
-                page=page_number,
-                snippet=line.strip()[:200],
-                method="regex",
-                score=score,
-            ))
+        values = _extract_line_numbers(line, actual_end)
+        value = _pick_current_year_value(values, col_count, section)
+        if value is None:
+            continue
+
+        # Score: base 1, +2 for correct primary statement
+        score = 1
+        if metric in INCOME_LABELS and section == "pl":
+            score += 2
+        elif metric in BALANCE_LABELS and section == "bs":
+            score += 2
+
+        by_metric[metric].append(Candidate(
+            metric=metric,
+            value=value,
+            page=page_number,
+            snippet=line.strip()[:200],
+            method="regex",
+            score=score,
+        ))
+
+    for metric_candidates in by_metric.values():
+        candidates.extend(metric_candidates)
 
     return candidates
 
@@ -296,19 +328,16 @@ def _extract_table_candidates(
     if not table or len(table) < 2:
         return candidates
 
-    if section == "pl":
-        label_sets = INCOME_LABELS
-    elif section == "bs":
-        label_sets = BALANCE_LABELS
-    else:
+    if section not in _SECTION_LABELS:
         return candidates
+    label_re = _SECTION_LABELS[section][1]
 
     # Detect current-year column from header
     header = [str(cell or "").strip() for cell in table[0]]
     year_col_idx = None
     best_year = 0
     for idx, h in enumerate(header):
-        m = re.search(r"20(\d{2})", h)
+        m = _HEADER_YEAR_RE.search(h)
         if m:
             yr = int("20" + m.group(1))
             if yr > best_year:
@@ -326,39 +355,40 @@ def _extract_table_candidates(
         if not label_cell:
             continue
 
-        for metric, keywords in label_sets.items():
-            if _label_matches(label_cell, keywords) is None:
-                continue
+        match = label_re.match(_normalise(label_cell))
+        if match is None:
+            continue
+        metric = match.lastgroup
 
-            value = None
-            if year_col_idx is not None and year_col_idx < len(row):
-                value = parse_number(row[year_col_idx])
+        value = None
+        if year_col_idx is not None and year_col_idx < len(row):
+            value = parse_number(row[year_col_idx])
 
-            if value is None:
-                for idx, cell in enumerate(row[1:], start=1):
-                    v = parse_number(cell)
-                    if v is not None and abs(v) >= 100:
-                        value = v
-                        break
+        if value is None:
+            for idx, cell in enumerate(row[1:], start=1):
+                v = parse_number(cell)
+                if v is not None and abs(v) >= 100:
+                    value = v
+                    break
 
-            if value is None:
-                continue
+        if value is None:
+            continue
 
-            snippet = " | ".join(str(c or "").strip() for c in row if c)
-            score = 2  # table gets base 2
-            if metric in INCOME_LABELS and section == "pl":
-                score += 2
-            elif metric in BALANCE_LABELS and section == "bs":
-                score += 2
-
-            candidates.append(Candidate(
-                metric=metric,
-                value=value,
-                page=page_number,
-                snippet=snippet[:200],
-                method="table",
-                score=score,
-            ))
+        snippet = " | ".join(str(c or "").strip() for c in row if c)
+        score = 2  # table gets base 2
+        if metric in INCOME_LABELS and section == "pl":
+            score += 2
+        elif metric in BALANCE_LABELS and section == "bs":
+            score += 2
+
+        candidates.append(Candidate(
+            metric=metric,
+            value=value,
+            page=page_number,
+            snippet=snippet[:200],
+            method="table",
+            score=score,
+        ))
 
     return candidates
 
@@ -367,19 +397,59 @@ def _extract_table_candidates(
 # 6) NOTE-BLOCK EXTRACTION (Note 20 & Note 8)
 # ───────────────────────────────────────────────────────────
 
+_NOTE20_START = re.compile(r"\b\d+\.\s*Investment income\b", re.IGNORECASE)
+_NOTE20_END = re.compile(
+    r"\b\d+\.\s*(?:Dividend income|General and administrative|Other income)\b",
+    re.IGNORECASE,
+)
+_NOTE8_START = re.compile(
+    r"\b\d+\.\s*Financial assets measured at fair value through other comprehensive income",
+    re.IGNORECASE,
+)
+_NOTE8_END = re.compile(r"\b\d+\.\s*Investments at amortised cost\b", re.IGNORECASE)
+
+# Note-table line shapes
+_NOTE_HEADING_RE = re.compile(r"^\d+\.\s")
+_AED_HEADER_RE = re.compile(r"^AED", re.IGNORECASE)
+_YEAR_ONLY_RE = re.compile(r"^[\s]*20\d{2}\s+20\d{2}[\s]*$")
+_NUMBERS_ONLY_RE = re.compile(r"^[\d,.\s()-]+$")
+
+
 def _find_note_block(
-    full_text: str, note_pattern: str, end_pattern: str
+    full_text: str, note_pattern: Pattern[str], end_pattern: Pattern[str]
 ) -> Optional[str]:
     """Isolate a note section from full document text."""
-    match = re.search(note_pattern, full_text, re.IGNORECASE)
+    match = note_pattern.search(full_text)
     if not match:
         return None
     start = match.start()
-    end_match = re.search(end_pattern, full_text[match.end():], re.IGNORECASE)
+    end_match = end_pattern.search(full_text[match.end():])
     end = match.end() + end_match.start() if end_match else min(start + 3000, len(full_text))
     return full_text[start:end]
 
 
+@dataclass
+class _NoteScan:
+    """Tracks whether a note block is complete as pages stream in.
+
+    Each page is searched once: first for the note heading, then (from
+    the heading on) for the heading that closes the note.
+    """
+    note_pattern: Pattern[str]
+    end_pattern: Pattern[str]
+    started: bool = False
+
+    def feed(self, page_text: str) -> bool:
+        """Scan the next page; True once the closing heading has been seen."""
+        if not self.started:
+            match = self.note_pattern.search(page_text)
+            if match is None:
+                return False
+            self.started = True
+            page_text = page_text[match.end():]
+        return self.end_pattern.search(page_text) is not None
+
+
 def _extract_note20_breakdown(full_text: str) -> Dict[str, Optional[float]]:
     """Extract the investment income breakdown from the Investment income note.
 
@@ -395,11 +465,7 @@ def _extract_note20_breakdown(full_text: str) -> Dict[str, Optional[float]]:
         "investment_income_total": None,
     }
 
-    block = _find_note_block(
-        full_text,
-        r"\b\d+\.\s*Investment income\b",
-        r"\b\d+\.\s*(?:Dividend income|General and administrative|Other income)\b",
-    )
+    block = _find_note_block(full_text, _NOTE20_START, _NOTE20_END)
     if not block:
         return result
 
@@ -414,8 +480,8 @@ def _extract_note20_breakdown(full_text: str) -> Dict[str, Optional[float]]:
         if (
             merged
             and not _NUM_RE.search(merged[-1])
-            and not re.match(r"^\d+\.\s", merged[-1].strip())
-            and not re.match(r"^AED", merged[-1].strip(), re.IGNORECASE)
+            and not _NOTE_HEADING_RE.match(merged[-1].strip())
+            and not _AED_HEADER_RE.match(merged[-1].strip())
         ):
             merged[-1] = merged[-1].rstrip() + " " + stripped
         else:
@@ -442,7 +508,6 @@ def _extract_note20_breakdown(full_text: str) -> Dict[str, Optional[float]]:
             result["investment_income_fvtoci"] = val
 
     # Note total: numbers-only line (skip year headers like "2025 2024")
-    _YEAR_ONLY_RE = re.compile(r"^[\s]*20\d{2}\s+20\d{2}[\s]*$")
     for line in merged:
         stripped = line.strip()
         # Skip year headers
@@ -451,7 +516,7 @@ def _extract_note20_breakdown(full_text: str) -> Dict[str, Optional[float]]:
         # Skip "AED'000" header lines
         if "aed" in stripped.lower():
             continue
-        if re.match(r"^[\d,.\s()-]+$", stripped):
+        if _NUMBERS_ONLY_RE.match(stripped):
             nums = [parse_number(m) for m in _NUM_RE.findall(stripped)]
             nums = [n for n in nums if n is not None and abs(n) >= 100]
             if nums:
@@ -473,11 +538,7 @@ def _extract_note8_fvtoci_split(full_text: str) -> Dict[str, Optional[float]]:
         "fvtoci_total": None,
     }
 
-    block = _find_note_block(
-        full_text,
-        r"\b\d+\.\s*Financial assets measured at fair value through other comprehensive income",
-        r"\b\d+\.\s*Investments at amortised cost\b",
-    )
+    block = _find_note_block(full_text, _NOTE8_START, _NOTE8_END)
     if not block:
         return result
 
@@ -506,14 +567,13 @@ def _extract_note8_fvtoci_split(full_text: str) -> Dict[str, Optional[float]]:
             result["fvtoci_sukuk"] = val
 
     # Total: numbers-only line with a value > 1M (AED'000)
-    _YEAR_ONLY_RE = re.compile(r"^[\s]*20\d{2}\s+20\d{2}[\s]*$")
     for line in lines:
         stripped = line.strip()
         if _YEAR_ONLY_RE.match(stripped):
             continue
         if "aed" in stripped.lower():
             continue
-        if re.match(r"^[\d,.\s()-]+$", stripped):
+        if _NUMBERS_ONLY_RE.match(stripped):
             nums = [parse_number(m) for m in _NUM_RE.findall(stripped)]
             nums = [n for n in nums if n is not None and abs(n) >= 1_000_000]
             if nums:
@@ -557,7 +617,111 @@ def _best_candidates(candidates: List[Candidate]) -> Dict[str, Candidate]:
 
 
 # ───────────────────────────────────────────────────────────
-# 8) MAIN PARSE FUNCTION
+# 8) PAGE BACKENDS
+# ───────────────────────────────────────────────────────────
+
+# Same vertical tolerance pdfplumber uses to group chars into lines
+_LINE_Y_TOLERANCE = 3
+
+
+def _pdf_source(file):
+    """A path as-is, or a file object's bytes (rewound) for the backends to share."""
+    if isinstance(file, (str, os.PathLike)):
+        return file
+    data = file.read()
+    file.seek(0)
+    return data
+
+
+def _open_text_doc(file):
+    """Open a PyMuPDF document, or None if unavailable."""
+    if not _HAS_PYMUPDF:
+        return None
+    import pymupdf
+
+    source = _pdf_source(file)
+    if isinstance(source, bytes):
+        return pymupdf.open(stream=source, filetype="pdf")
+    return pymupdf.open(source)
+
+
+def _pymupdf_page_text(page) -> str:
+    """Rebuild pdfplumber-style lines from PyMuPDF words.
+
+    Words are grouped by baseline (within _LINE_Y_TOLERANCE) and joined
+    left-to-right, so the line-oriented label/number regexes see the
+    same layout as pdfplumber's extract_text().
+    """
+    lines: List[List[tuple]] = []
+    line_y = None
+    for word in sorted(page.get_text("words"), key=lambda w: (w[3], w[0])):
+        if line_y is None or abs(word[3] - line_y) > _LINE_Y_TOLERANCE:
+            lines.append([])
+            line_y = word[3]
+        lines[-1].append(word)
+    return "\n".join(
+        " ".join(w[4] for w in sorted(line, key=lambda w: w[0])) for line in lines
+    )
+
+
+def _pymupdf_page_tables(page) -> List[List[List[Optional[str]]]]:
+    """PyMuPDF's port of pdfplumber's table finder; same cell grid, faster."""
+    return [table.extract() for table in page.find_tables().tables]
+
+
+_Page = Tuple[str, Callable[[], List[List[List[Optional[str]]]]]]
+
+
+def _iter_pdfium_pages(file) -> Iterator[_Page]:
+    """PDFium page text, with pdfplumber opened only once a page needs tables."""
+    import pypdfium2
+
+    source = _pdf_source(file)
+    with ExitStack() as stack:
+        doc = pypdfium2.PdfDocument(source)
+        stack.callback(doc.close)
+        plumber = []
+
+        def page_tables(index):
+            if not plumber:
+                import pdfplumber
+
+                opened = pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+                plumber.append(stack.enter_context(opened))
+            return plumber[0].pages[index].extract_tables()
+
+        for index, page in enumerate(doc):
+            yield page.get_textpage().get_text_range(), partial(page_tables, index)
+
+
+def _iter_pages(file) -> Iterator[_Page]:
+    """Yield (text, extract_tables) per page.
+
+    PyMuPDF serves both when installed, so pdfplumber is never opened;
+    next best is PDFium text with pdfplumber tables, and pdfplumber alone
+    handles both as the last resort. Tables are extracted lazily since
+    only a few statement pages need them.
+    """
+    doc = _open_text_doc(file)
+    if doc is not None:
+        with doc:
+            for page in doc:
+                yield _pymupdf_page_text(page), partial(_pymupdf_page_tables, page)
+        return
+
+    if _HAS_PYPDFIUM2:
+        yield from _iter_pdfium_pages(file)
+        return
+
+    import pdfplumber
+
+    with pdfplumber.open(file) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or "", page.extract_tables
+
+
+# ───────────────────────────────────────────────────────────
+# 9) MAIN PARSE FUNCTION
 # ───────────────────────────────────────────────────────────
 
 def parse_pdf_financials(file) -> Dict[str, object]:
@@ -578,36 +742,43 @@ def parse_pdf_financials(file) -> Dict[str, object]:
     candidates: List[Candidate] = []
 
     page_texts: List[str] = []
-    page_sections: List[Optional[str]] = []
 
-    with pdfplumber.open(file) as pdf:
-        # PASS 1: Read + classify all pages
-        for page in pdf.pages:
-            text = page.extract_text() or ""
+    with closing(_iter_pages(file)) as pages:
+        # PASS 1+2: Stream pages — classify each one and extract candidates
+        # from primary statements as we go. Text extraction dominates the
+        # parse cost, so stop once both statements have been seen and the
+        # note blocks used below are complete.
+        seen_sections = set()
+        pending_notes = [_NoteScan(_NOTE20_START, _NOTE20_END), _NoteScan(_NOTE8_START, _NOTE8_END)]
+        for page_idx, (text, extract_tables) in enumerate(pages):
+            section = _classify_page(text)
             page_texts.append(text)
-            page_sections.append(_classify_page(text))
-
-        # PASS 2: Extract candidates from primary statements only
-        for page_idx, page in enumerate(pdf.pages):
-            text = page_texts[page_idx]
-            section = page_sections[page_idx]
             page_number = page_idx + 1
 
-            if section not in ("pl", "bs"):
-                continue
+            if section in ("pl", "bs"):
+                seen_sections.add(section)
+                col_count = _detect_column_count(text)
+                lines = text.split("\n")
 
-            col_count = _detect_column_count(text)
-            lines = text.split("\n")
-
-            candidates.extend(
-                _extract_regex_candidates(lines, page_number, section, col_count)
-            )
-
-            for table in page.extract_tables() or []:
                 candidates.extend(
-                    _extract_table_candidates(table, page_number, section)
+                    _extract_regex_candidates(lines, page_number, section, col_count)
                 )
 
+                # Table extraction is the costliest step per page; skip it on
+                # statement pages where no line-item label appears at all
+                # (cover, index and continuation pages).
+                if _SECTION_LABELS[section][1].search(_normalise(text)):
+                    for table in extract_tables() or []:
+                        candidates.extend(
+                            _extract_table_candidates(table, page_number, section)
+                        )
+
+            # A note block stays complete once closed, so only open ones
+            # are fed the new page
+            pending_notes = [note for note in pending_notes if not note.feed(text)]
+            if seen_sections >= {"pl", "bs"} and not pending_notes:
+                break
+
     # PASS 3: Best candidates
     best = _best_candidates(candidates)
 
@@ -721,7 +892,7 @@ def parse_pdf_financials(file) -> Dict[str, object]:
 
 
 # ───────────────────────────────────────────────────────────
-# 9) PORTFOLIO HELPERS
+# 10) PORTFOLIO HELPERS
 # ───────────────────────────────────────────────────────────
 
 def compute_portfolio_from_metrics(metrics: Dict[str, float]) -> Optional[float]:
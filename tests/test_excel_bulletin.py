@@ -0,0 +1,32 @@
+import io
+
+import pandas as pd
+
+from parsers.excel_bulletin import parse_excel_bulletin
+
+
+def _workbook(rows) -> io.BytesIO:
+    buf = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buf, header=False, index=False)
+    buf.seek(0)
+    return buf
+
+
+def test_market_grand_total_row():
+    result = parse_excel_bulletin(_workbook([
+        ["DFM Daily Bulletin", None],
+        [" Symbol ", "Trade Value"],
+        ["EMAAR", "1,000"],
+        ["  MARKET Grand Total ", "2,500,000"],
+    ]))
+    assert result["metrics"]["total_traded_value"] == 2500
+    assert result["audit"][0]["snippet"] == "sheet=Sheet1, row=3, col=1"
+    assert result["audit"][0]["confidence"] == "header_row=1"
+
+
+def test_missing_total_row():
+    result = parse_excel_bulletin(_workbook([
+        ["Symbol", "Trade Value"],
+        ["EMAAR", "1,000"],
+    ]))
+    assert result == {"metrics": {}, "audit": [], "items": []}
@@ -15,10 +15,14 @@ Tests cover:
   - Portfolio computations (total and EaR)
 """
 
+import io
 import os
 import pytest
 
 from parsers.pdf_financials import (
+    _NOTE8_END,
+    _NOTE8_START,
+    _NoteScan,
     parse_pdf_financials,
     compute_portfolio_from_metrics,
     compute_ear_portfolio,
@@ -268,6 +272,71 @@ class TestQ3InterimNote20:
         assert len(q3_result["warnings"]) == 0
 
 
+# ═══════════════════════════════════════════════════════════
+# TEXT BACKENDS
+# ═══════════════════════════════════════════════════════════
+
+
+class TestTextBackends:
+    """Every fallback backend must reproduce the primary extraction."""
+
+    def test_pdfplumber_fallback_matches(self, q3_result, monkeypatch):
+        import parsers.pdf_financials as pdf_financials
+
+        if not pdf_financials._HAS_PYMUPDF:
+            pytest.skip("PyMuPDF not installed")
+        monkeypatch.setattr(pdf_financials, "_HAS_PYMUPDF", False)
+        monkeypatch.setattr(pdf_financials, "_HAS_PYPDFIUM2", False)
+        fallback = parse_pdf_financials(Q3_FS_FIXTURE)
+        assert fallback["metrics"] == q3_result["metrics"]
+        assert fallback["audit"] == q3_result["audit"]
+
+    def test_pypdfium2_fallback_matches(self, q3_result, monkeypatch):
+        import parsers.pdf_financials as pdf_financials
+
+        if not (pdf_financials._HAS_PYMUPDF and pdf_financials._HAS_PYPDFIUM2):
+            pytest.skip("PyMuPDF or pypdfium2 not installed")
+        monkeypatch.setattr(pdf_financials, "_HAS_PYMUPDF", False)
+        with open(Q3_FS_FIXTURE, "rb") as fh:
+            fallback = parse_pdf_financials(io.BytesIO(fh.read()))
+        assert fallback["metrics"] == q3_result["metrics"]
+        assert fallback["audit"] == q3_result["audit"]
+
+
+# ═══════════════════════════════════════════════════════════
+# EARLY-EXIT NOTE DETECTION
+# ═══════════════════════════════════════════════════════════
+
+
+class TestNoteScan:
+    """Streaming parse only stops once a note block has been closed."""
+
+    def test_heading_without_end_is_incomplete(self):
+        text = "8. Financial assets measured at fair value through other comprehensive income\nEquity securities 1,118,400"
+        assert not _NoteScan(_NOTE8_START, _NOTE8_END).feed(text)
+
+    def test_heading_with_end_is_complete(self):
+        text = (
+            "8. Financial assets measured at fair value through other comprehensive income\n"
+            "Equity securities 1,118,400\n"
+            "9. Investments at amortised cost"
+        )
+        assert _NoteScan(_NOTE8_START, _NOTE8_END).feed(text)
+
+    def test_end_before_heading_does_not_count(self):
+        text = (
+            "9. Investments at amortised cost\n"
+            "8. Financial assets measured at fair value through other comprehensive income"
+        )
+        assert not _NoteScan(_NOTE8_START, _NOTE8_END).feed(text)
+
+    def test_heading_and_end_on_separate_pages(self):
+        scan = _NoteScan(_NOTE8_START, _NOTE8_END)
+        assert not scan.feed("9. Investments at amortised cost")
+        assert not scan.feed("8. Financial assets measured at fair value through other comprehensive income")
+        assert scan.feed("9. Investments at amortised cost")
+
+
 # ═══════════════════════════════════════════════════════════
 # UPLOADED COPY TEST (if available)
 # ═══════════════════════════════════════════════════════════